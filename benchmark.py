@@ -0,0 +1,260 @@
+##
+# @file benchmark.py
+#
+# @brief Micro-benchmarks of the stages of a step of the model.
+#
+# @author  Louis L'Haridon
+#
+# @section description_benchmark Description
+# The robot of define_khepera() runs offline : its transport is a transport.MockTransport answering
+# like server/server.c for a SimulatedKhepera moving in the default arena, so the real code path
+# (commands, replies, decoding, parsing) is used without robot nor socat.
+# With --capture the robot reads instead the data of a run captured on the real robot
+# (see Robot.start_capture()), as fast as possible, until the end of the capture.
+#
+# The stages are timed by the tracer of the robot (tracing.Tracer) in the real Robot.update(),
+# the marks of the update giving :
+# - serial : sensor commands sent and replies read and decoded (Robot.acquire)
+# - parse : raw values given to the sensors (Robot.dispatch / Sensor.parse)
+# - variables : physiological variables and their leds
+# - stimuli, motivations, nociceptor, hormone : their update
+# - wellbeing : wellbeing and pain
+# - wta : Robot.WTA
+# - behavior : Robot.behave
+# - actuators : incentives, motors and leds
+# - update : the whole Robot.update
+# then the benchmark times :
+# - log : Robot.save to a temporary log
+# - display : dashboard written to a null stream
+# - step : update, log and display
+#
+# The percentiles of each stage can be saved as a baseline (json) and later runs compared to it,
+# a stage being a regression when its median is slower than the baseline by more than the tolerance.
+#
+# @section usage_benchmark Usage
+# python benchmark.py [-n steps] [--variant model] [--binary] [--capture run.ksess] [--save baseline.json] [--compare baseline.json]
+#
+# Copyright (c) 2022 Louis L'Haridon.  All rights reserved.
+
+# Modules
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+from timeit import default_timer as timer
+
+import model
+import simulator
+import tracing
+import transport
+
+STAGES = ["serial", "parse", "variables", "stimuli", "motivations", "nociceptor", "hormone", "wellbeing", "wta", "behavior",
+          "actuators", "update", "log", "display", "step"]
+SPANS_PER_STEP = 64     #size of the trace of a step, serial commands and retries included
+PERCENTILES = [50, 90, 99]
+
+
+def percentile(
+        values, #type: list
+        p       #type: float
+    ):
+    """
+    It returns the p-th percentile (nearest rank) of sorted values.
+    """
+    if not values:
+        return 0.0
+    k = int(round(p / 100.0 * (len(values) - 1)))
+    return values[max(0, min(len(values) - 1, k))]
+
+
+def summarize(
+        samples #type: list
+    ):
+    """
+    It returns the statistics (us) of the durations (s) of a stage.
+    """
+    values = sorted(samples)
+    stats = {"calls": len(values)}
+    for p in PERCENTILES:
+        stats["p" + str(p)] = percentile(values, p) * 1e6
+    stats["max"] = values[-1] * 1e6 if values else 0.0
+    stats["mean"] = sum(values) / len(values) * 1e6 if values else 0.0
+    return stats
+
+
+def offline_khepera(
+        variant = model.VARIANT,    #type: str
+        seed = 0,                   #type: int
+        capture = None              #type: str
+    ):
+    """
+    It returns the robot of define_khepera() connected to a simulated server by a mock transport,
+    or reading the data of a capture.
+
+    @return The robot and the simulated robot behind its serial port (None with a capture).
+    """
+    robot = model.define_khepera(True, seed = seed, variant = variant)
+    if capture is not None:
+        robot.world = None
+        robot.com = transport.CaptureTransport(capture)
+        return robot, None
+    world = robot.world
+    if world is None:
+        world = simulator.SimulatedKhepera(simulator.default_arena(947, 477, seed = seed))
+    #the model talks to the server, the simulated robot is stepped by the benchmark
+    robot.world = None
+    robot.com = transport.MockTransport(simulator.SimulatedServer(world))
+    return robot, world
+
+
+def run(
+        steps = 2000,               #type: int
+        warmup = 100,               #type: int
+        variant = model.VARIANT,    #type: str
+        seed = 0,                   #type: int
+        capture = None              #type: str
+    ):
+    """
+    It runs the benchmark.
+
+    @param steps The number of timed steps.
+    @param warmup The number of steps run before timing.
+    @param variant The variant of the model.
+    @param seed The seed of the random behaviors and of the arena.
+    @param capture The capture read by the robot, the mock transport is used if None.
+                   ValueError is raised if it ends before any step after the warmup.
+
+    @return A dict giving the statistics of every stage.
+    """
+    random.seed(seed)
+    model.set_clock(model.VirtualClock())
+    dt = model.TIME_SLEEP
+    #the stages are the spans of the tracer of the robot, set after the warmup
+    tracer = tracing.Tracer(steps * SPANS_PER_STEP)
+    directory = tempfile.mkdtemp()
+    null = open(os.devnull, "w")
+    try:
+        robot, world = offline_khepera(variant, seed, capture)
+        filename = os.path.join(directory, "benchmark" + (".rlog" if model.LOG_FORMAT == "rlog" else ".csv"))
+        robot.write_header_data(filename)
+        iter = 0
+        for i in range(warmup + steps):
+            if i == warmup:
+                robot.set_tracer(tracer)
+            if world is not None:
+                world.step(dt)
+            robot.tracer.start()
+            try:
+                robot.update(False, False, dt)
+            except EOFError:
+                if i <= warmup:
+                    raise ValueError("the capture " + str(capture) + " ends after " + str(i) + " steps, no step after the warmup (" + str(warmup) + " steps) is timed")
+                break
+            robot.tracer.end("update")
+            iter = robot.save(filename, model.clock.time() * 1000, iter)
+            robot.tracer.mark("log")
+            null.write(model.ANSI_CLEAR + "\n".join(model.dashboard(robot, iter, model.clock.time() * 1000)) + "\n")
+            robot.tracer.mark("display")
+            robot.tracer.end("step")
+            model.clock.sleep(dt)
+        robot.close_log()
+    finally:
+        null.close()
+        shutil.rmtree(directory, ignore_errors = True)
+    if tracer.recorded > tracer.size:
+        raise ValueError("more than " + str(SPANS_PER_STEP) + " spans per step, the first steps are lost")
+    samples = dict((s, []) for s in STAGES)
+    for name, start, end, thread in tracer.events():
+        if name in samples:
+            samples[name].append(end - start)
+    return dict((s, summarize(samples[s])) for s in STAGES)
+
+
+def compare(
+        stats,          #type: dict
+        baseline,       #type: dict
+        tolerance = 0.2 #type: float
+    ):
+    """
+    It compares the medians of the stages to a baseline.
+
+    @param tolerance The allowed slowdown, 0.2 for 20%.
+
+    @return A dict giving the relative change of the median of each stage of the baseline
+            and the list of the stages slower than the tolerance.
+    """
+    changes = {}
+    regressions = []
+    for s in STAGES:
+        if s not in stats or s not in baseline or baseline[s]["p50"] <= 0:
+            continue
+        changes[s] = stats[s]["p50"] / baseline[s]["p50"] - 1.0
+        if changes[s] > tolerance:
+            regressions.append(s)
+    return changes, regressions
+
+
+def report(
+        stats,          #type: dict
+        changes = None  #type: dict
+    ):
+    """
+    It returns the lines of the table of the statistics (us) of the stages.
+    """
+    f = "{0:>9.1f}".format
+    columns = ["p" + str(p) for p in PERCENTILES] + ["max", "mean"]
+    header = "{0:<12}{1:>7}".format("stage", "calls") + "".join("{0:>9}".format(c) for c in columns)
+    if changes is not None:
+        header += "{0:>10}".format("vs base")
+    lines = [header + "  (us)"]
+    for s in STAGES:
+        line = "{0:<12}{1:>7}".format(s, stats[s]["calls"]) + "".join(f(stats[s][c]) for c in columns)
+        if changes is not None and s in changes:
+            line += "{0:>+9.1f}%".format(changes[s] * 100)
+        lines.append(line)
+    return lines
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description = "Micro-benchmarks of the stages of a step of the model, run offline.")
+    parser.add_argument("-n", "--steps", type = int, default = 2000, help = "timed steps (def 2000)")
+    parser.add_argument("-w", "--warmup", type = int, default = 100, help = "steps run before timing (def 100)")
+    parser.add_argument("--variant", default = model.VARIANT, choices = sorted(model.VARIANTS), help = "variant of the model")
+    parser.add_argument("--seed", type = int, default = 0, help = "seed of the behaviors and of the arena")
+    parser.add_argument("--binary", action = "store_true", help = "read the sensors with the binary frame ('X')")
+    parser.add_argument("--capture", metavar = "FILE", help = "read the data of a captured run instead of the simulated robot")
+    parser.add_argument("--save", metavar = "FILE", help = "save the results as a baseline")
+    parser.add_argument("--compare", metavar = "FILE", help = "compare the results to a baseline")
+    parser.add_argument("--tolerance", type = float, default = 0.2, help = "allowed slowdown of the medians (def 0.2)")
+    options = parser.parse_args(args[1:])
+
+    model.BINARY_FRAME = options.binary
+    model.LOG_THREAD = False
+    try:
+        stats = run(options.steps, options.warmup, options.variant, options.seed, options.capture)
+    except ValueError as error:
+        print("error : " + str(error))
+        return 1
+
+    changes, regressions = None, []
+    if options.compare:
+        with open(options.compare, "r") as file:
+            baseline = json.load(file)
+        changes, regressions = compare(stats, baseline["stages"], options.tolerance)
+    print("\n".join(report(stats, changes)))
+    if options.save:
+        config = {"steps": options.steps, "warmup": options.warmup, "variant": options.variant,
+                  "seed": options.seed, "binary": options.binary, "capture": options.capture}
+        with open(options.save, "w") as file:
+            json.dump({"config": config, "stages": stats}, file, indent = 2, sort_keys = True)
+    if regressions:
+        print("regressions (> " + str(int(options.tolerance * 100)) + "%) : " + ", ".join(regressions))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -34,6 +34,8 @@ import os
 import sys
 import time
 import getopt
+import select
+import errno
 
 
 # Map from the numbers to the termios constants (which are pretty much
@@ -59,19 +61,144 @@ ISPEED = 4
 OSPEED = 5
 CC = 6
 
+# Size of a single os.read() in buffered mode and default line timeout.
+
+READ_CHUNK = 256
+READ_TIMEOUT = 1.0
+
 
 def bps_to_termios_sym(bps):
     return BPS_SYMS[bps]
 
 
-class SerialPort(object):
+def to_str(data):
+    """Converts bytes read from the port to the native str type."""
+    if isinstance(data, str):
+        return data
+    return data.decode('latin-1')
+
+
+class Transport(object):
+    """Buffered reader of the replies of the robot, shared by the serial
+    port and the other transports (see transport.py).
+
+    Subclasses append the received bytes to rbuf in fill() and send the
+    commands in write().
+    """
+    def __init__(self, buffered=True, timeout=READ_TIMEOUT):
+        self.buffered = buffered
+        self.timeout = timeout
+        # bytes received but not yet returned to the caller
+        self.rbuf = bytearray()
+        # binary frames dropped because of a wrong checksum
+        self.bad_frames = 0
+
+    def fill(self, timeout):
+        """Waits for incoming bytes (at most timeout seconds) and appends
+        them to the internal buffer.
+
+        Returns the number of bytes read, 0 on timeout.
+        """
+        raise NotImplementedError
+
+    def write(self, data):
+        raise NotImplementedError
+
+    def write_byte(self, byte):
+        self.write(bytes(bytearray([byte])))
+
+    def read_until(self, until, timeout=None):
+        """Returns the next line, waiting at most timeout seconds (the
+        timeout of the transport if None)."""
+        if timeout is None:
+            timeout = self.timeout
+        return self.read_line(until, timeout)
+
+    def read_line(self, until='\n', timeout=READ_TIMEOUT):
+        """Returns the next line terminated by until (terminator included).
+
+        Complete lines already in the buffer are returned without any
+        syscall. On timeout an empty string is returned and the partial
+        line is kept in the buffer for the next call.
+        """
+        sep = until if isinstance(until, bytes) else until.encode('latin-1')
+        deadline = time.time() + timeout
+        while True:
+            idx = self.rbuf.find(sep)
+            if idx >= 0:
+                end = idx + len(sep)
+                line = bytes(self.rbuf[:end])
+                del self.rbuf[:end]
+                return to_str(line)
+            remaining = deadline - time.time()
+            if remaining <= 0 or not self.fill(remaining):
+                return ""
+
+    def read_frame(self, header, timeout=READ_TIMEOUT):
+        """Returns the payload of the next binary frame
+        header | length | payload | checksum, the checksum being the sum of
+        the payload bytes modulo 256.
+
+        Bytes before the header (e.g. text replies) are dropped. Returns
+        None on timeout or if the checksum does not match, in which case
+        the header byte is dropped so the next call resynchronizes.
+        """
+        head = header if isinstance(header, bytes) else header.encode('latin-1')
+        deadline = time.time() + timeout
+        while True:
+            idx = self.rbuf.find(head)
+            if idx > 0:
+                del self.rbuf[:idx]
+            elif idx < 0:
+                del self.rbuf[:]
+            if len(self.rbuf) >= 2:
+                length = self.rbuf[1]
+                if len(self.rbuf) >= length + 3:
+                    payload = bytes(self.rbuf[2:length + 2])
+                    checksum = self.rbuf[length + 2]
+                    if sum(bytearray(payload)) & 0xFF != checksum:
+                        del self.rbuf[:1]
+                        self.bad_frames += 1
+                        return None
+                    del self.rbuf[:length + 3]
+                    return payload
+            remaining = deadline - time.time()
+            if remaining <= 0 or not self.fill(remaining):
+                return None
+
+    def in_waiting(self):
+        """Returns the number of bytes buffered but not consumed yet."""
+        return len(self.rbuf)
+
+    def drain(self):
+        """Drops the bytes buffered and those already received, without
+        waiting, so the next bytes read are the reply of the next command.
+
+        Returns the number of bytes dropped.
+        """
+        while self.fill(0):
+            pass
+        n = len(self.rbuf)
+        del self.rbuf[:]
+        return n
+
+    def close(self):
+        pass
+
+
+class SerialPort(Transport):
     """Represents a serial port connected to an Arduino."""
-    def __init__(self, serialport, bps):
+    def __init__(self, serialport, bps, buffered=False, timeout=READ_TIMEOUT):
         """Takes the string name of the serial port (e.g.
         "/dev/tty.usbserial","COM1") and a baud rate (bps) and connects to
         that port at that speed and 8N1. Opens the port in fully raw mode
         so you can send binary data.
+
+        If buffered is True, read_until() reads whatever is available in
+        chunks into an internal buffer and waits with select() (at most
+        timeout seconds) instead of reading one byte at a time.
         """
+        Transport.__init__(self, buffered, timeout)
         self.fd = os.open(serialport, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
         attrs = termios.tcgetattr(self.fd)
         bps_sym = bps_to_termios_sym(bps)
@@ -91,6 +218,8 @@ class SerialPort(object):
         attrs[CFLAG] |= termios.CREAD | termios.CLOCAL
         # Turn off software flow control.
         attrs[IFLAG] &= ~(termios.IXON | termios.IXOFF | termios.IXANY)
+        # Keep '\r' as is, otherwise each "\r\n" reads as two lines.
+        attrs[IFLAG] &= ~(termios.ICRNL | termios.INLCR | termios.IGNCR)
 
         # Make raw.
         attrs[LFLAG] &= ~(termios.ICANON |
@@ -105,16 +234,31 @@ class SerialPort(object):
         attrs[CC][termios.VTIME] = 20
         termios.tcsetattr(self.fd, termios.TCSANOW, attrs)
 
-    def read_until(self, until):
-        buf = ""
+    def read_until(self, until, timeout=None):
+        if self.buffered:
+            return Transport.read_until(self, until, timeout)
+        if timeout is None:
+            timeout = self.timeout
+        deadline = time.time() + timeout
+        # partial line of a previous call which timed out
+        buf = to_str(bytes(self.rbuf))
+        del self.rbuf[:]
         done = False
         while not done:
             # edit louis l'haridon - add try catch in case serial port is empty
             try : 
-                n = os.read(self.fd,1)
-                #n = os.read(self.fd, 1)
+                try:
+                    n = to_str(os.read(self.fd, 1))
+                except OSError as error:
+                    # nothing received yet on the non blocking port
+                    if error.errno not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                        raise
+                    n = ''
                 if n == '':
                     # FIXME: Maybe worth blocking instead of busy-looping?
+                    if time.time() >= deadline:
+                        self.rbuf.extend(buf.encode('latin-1'))
+                        return ""
                     time.sleep(0.01)
                     continue
                 buf = buf + n
@@ -125,11 +269,38 @@ class SerialPort(object):
                 pass
         return buf
 
-    def write(self, str):
-        os.write(self.fd, str)
+    def fill(self, timeout):
+        """Waits until the port is readable (at most timeout seconds) and
+        appends every available byte to the internal buffer.
 
-    def write_byte(self, byte):
-        os.write(self.fd, chr(byte))
+        Returns the number of bytes read, 0 on timeout.
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return 0
+        n = 0
+        while True:
+            try:
+                chunk = os.read(self.fd, READ_CHUNK)
+            except OSError as error:
+                if error.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    break
+                raise
+            if not chunk:
+                break
+            self.rbuf.extend(chunk)
+            n += len(chunk)
+            if len(chunk) < READ_CHUNK:
+                break
+        return n
+
+    def write(self, data):
+        if not isinstance(data, bytes):
+            data = data.encode('latin-1')
+        os.write(self.fd, data)
+
+    def close(self):
+        os.close(self.fd)
 
 
 def main(args):
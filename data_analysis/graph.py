@@ -3,7 +3,6 @@ from turtle import color
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
 import sys
 import matplotlib.ticker as ticker
 import mplcyberpunk
@@ -15,21 +14,21 @@ from matplotlib.colors import ListedColormap, BoundaryNorm
 import matplotlib.animation as animation
 from matplotlib.backends.backend_pdf import PdfPages
 import seaborn as sns
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import runlog
 
 
 
-filename1 =  str(sys.argv[1])+".csv"
+#run log (.rlog) if any, csv otherwise
+filename1 =  str(sys.argv[1])
 #filename1 = "/Users/lharidonlouis/Documents/Thesis/Work/pain_model/robot-model-for-pain/data_analysis/20220727-214436.csv"
 #filename1 = "/Users/lharidonlouis/Documents/Thesis/Work/pain_model/robot-model-for-pain/data_analysis/expe.csv"
 print(filename1)
 
 #names = ['iter', 'time', 'val_energy', 'val_temperature', 'def_energy', 'def_temperature', 'stim_food', 'stim_shade', 'stim_wall', 'mot_hunger', 'mot_cold', 'motor_left', 'motor_right', 'reactive', 'sensor_us_0', 'sensor_us_1', 'sensor_us_2', 'sensor_us_3', 'sensor_us_4', 'sensor_prox_0', 'sensor_prox_1', 'sensor_prox_2', 'sensor_prox_3', 'sensor_prox_4', 'sensor_prox_5', 'sensor_prox_6', 'sensor_prox_7', 'sensor_prox_8', 'sensor_prox_9', 'sensor_prox_10', 'sensor_prox_11', 'sensor_gnd_0', 'sensor_gnd_1', 'sensor_gnd_2', 'sensor_gnd_3', 'sensor_gnd_4', 'sensor_gnd_5', 'sensor_gnd_6', 'sensor_gnd_7', 'sensor_gnd_8', 'sensor_gnd_9', 'sensor_gnd_10', 'sensor_gnd_11', 'speed_1', 'speed_2', 'speed_3', 'speed_4', 'speed_5', 'speed_6', 'speed_7', 'speed_8', 'speed_9', 'speed_10', 'speed_11', 'speed_12', 'circ_1', 'circ_2', 'circ_3', 'circ_4', 'circ_5', 'circ_6', 'circ_7', 'circ_8', 'circ_9', 'circ_10', 'circ_11', 'circ_12', 'noci_1', 'noci_2', 'noci_3', 'noci_4', 'noci_5', 'noci_6', 'noci_7', 'noci_8', 'noci_9', 'noci_10', 'noci_11', 'noci_12', 'Unnamed:70']
 
-df = pd.read_csv(
-    filename1,
-    delimiter=",",
-    skiprows=0
-)
+df = runlog.load_dataframe(filename1)
 list(df.columns)
 
 
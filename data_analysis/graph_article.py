@@ -3,7 +3,6 @@ from turtle import color
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
 import sys
 import matplotlib.ticker as ticker
 import mplcyberpunk
@@ -16,6 +15,9 @@ import matplotlib.animation as animation
 from matplotlib.backends.backend_pdf import PdfPages
 import seaborn as sns
 from sklearn.cluster import KMeans
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import runlog
 
 
 filename1 =  "C1_2.csv"
@@ -28,35 +30,19 @@ filename4 =  "C4_test.csv"
 # filename3 =  "N3_1.csv"
 # filename4 =  "N4_1.csv"
 
-df1 = pd.read_csv(
-    filename1,
-    delimiter=",",
-    skiprows=0
-)
+df1 = runlog.load_dataframe(filename1)
 list(df1.columns)
 df1.time = df1.time.div(1000)
 
-df2 = pd.read_csv(
-    filename2,
-    delimiter=",",
-    skiprows=0
-)
+df2 = runlog.load_dataframe(filename2)
 list(df2.columns)
 df2.time = df2.time.div(1000)
 
-df3 = pd.read_csv(
-    filename3,
-    delimiter=",",
-    skiprows=0
-)
+df3 = runlog.load_dataframe(filename3)
 list(df3.columns)
 df3.time = df3.time.div(1000)
 
-df4 = pd.read_csv(
-    filename4,
-    delimiter=",",
-    skiprows=0
-)
+df4 = runlog.load_dataframe(filename4)
 list(df4.columns)
 df4.time = df4.time.div(1000)
 
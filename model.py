@@ -37,11 +37,31 @@
 # Modules
 from re import S
 import cstm_serial
+import runlog
+import simulator
+import tracing
+import transport
 import random
 import time
 import sys
 import os
 import math
+import struct
+import logging
+import threading
+try:
+    from time import monotonic
+except ImportError:
+    from time import time as monotonic
+from collections import OrderedDict, deque
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 # GLOBAL PARAMETERS
 # ----------------------------------------------------------------------------------------------------------------------
@@ -51,8 +71,148 @@ N_IR_SENSORS = 12   #Number of IR Sensors.
 SPEED_ROBOT = 500   #Constant for speed. 1200 MAX
 GAIN = 0.05        #constant for gain when consume resource
 LOOS = 0.0005      #constant for loose when behave
+BINARY_FRAME = False    #read sensors with the packed binary frame ('X') instead of the text frame ('Q')
+ASYNC_ACQUISITION = False   #read the next sensor frame in a background thread while the model computes
+SIMULATOR = True    #in simulation mode, sense and move in the 2D arena of simulator.py (random sensor values otherwise)
+VIRTUAL_CLOCK = True    #in simulation mode, run the steps as fast as possible on a virtual clock advancing TIME_SLEEP per step
+VECTORIZED_NOCICEPTOR = False  #use the NumPy nociceptor (VectorNociceptor), NumPy must be installed
+LOG_BUFFER_ROWS = 20    #rows kept in memory before writing the log file
+LOG_BUFFER_TIME = 1.0   #max time (s) a row is kept in memory before writing the log file
+LOG_FORMAT = "csv"      #format of the log file : "csv" or "rlog" (binary, see runlog.py)
+LOG_THREAD = True       #write the log file in a background thread
+LOG_QUEUE_SIZE = 200    #rows waiting for the writer thread
+LOG_QUEUE_POLICY = "drop"   #when the queue is full : "drop" the row or "block" the loop at most LOG_QUEUE_TIMEOUT
+LOG_QUEUE_TIMEOUT = 0.01    #max time (s) the loop waits for the writer thread with the "block" policy
+DISPLAY_LEVEL = "full"  #terminal dashboard : "off", "summary" or "full"
+DISPLAY_PERIOD = 0.5    #min time (s) between two refreshes of the dashboard
+ANSI_CLEAR = "\033[H\033[2J"  #move the cursor home and clear the terminal
+LOG_LEVEL = logging.INFO    #level of the trace messages, logging.DEBUG keeps the messages of each step
+TRACE_SIZE = 2000       #last trace messages kept in memory and dumped on crash
+TRACE_FILE = "trace.log"    #file where the trace is dumped on crash
+TIMING_TRACE = False    #record the duration of the stages of each step, exported next to the log as a Chrome trace (see tracing.py)
+TIMING_TRACE_SIZE = 65536   #spans kept in the ring buffer of the timing trace
+TRANSPORT = "serial"    #link to the robot : "serial" port, "mock" server simulating the robot, "replay" or "capture" of TRANSPORT_FILE (see transport.py)
+TRANSPORT_LATENCY = 0.0     #latency (s) of the replies of the "mock" server
+TRANSPORT_FILE = "session.ksess"    #session given back by the "replay" and "capture" transports
+TRANSPORT_RECORD = None     #if set, file where the commands and replies of the run are recorded
+REQUEST_TIMEOUT = 0.1   #max time (s) an attempt of a command waits for its reply
+REQUEST_RETRIES = 2     #times a command is sent again when its reply is missing or malformed
+REQUEST_SKIPPED = 8     #max other lines (acknowledgments) skipped while waiting for a reply
+CAPTURE_FILE = None     #if set, file where the lines and frames read from the robot are captured, to be run again with the "capture" transport
+REPLAY_SPEED = "real"   #pace of the "replay" and "capture" transports : "real" (recorded timing) or "max" (as fast as possible, on a virtual clock)
+CORTISOL = True         #release cortisol from the nociceptor, the concentration stays 0 otherwise
+PAIN_FORMULA = "modulated"  #pain from the nociceptor : "modulated" by wellbeing and cortisol or "constant" gain
+CIRCULAR_SCALING = True     #turn the circular distance of the nociceptor into a speed
+#variants of the model, formerly two files (model.py and model_w_corti.py)
+VARIANTS = {
+    "model": {"cortisol": True, "pain_formula": "modulated", "circular_scaling": True},
+    "model_w_corti": {"cortisol": False, "pain_formula": "constant", "circular_scaling": False},
+}
+VARIANT = "model"       #variant used by the command line
 # ----------------------------------------------------------------------------------------------------------------------
 
+#trace of the model, messages are formatted only when dumped
+log = logging.getLogger("model")
+
+
+# The class `RingBufferHandler` keeps the last trace messages in memory
+class RingBufferHandler(logging.Handler):
+    def __init__(
+            self,
+            size = TRACE_SIZE   #type: int
+        ):
+        logging.Handler.__init__(self)
+        self.records = deque(maxlen=size)
+        self.setFormatter(logging.Formatter("%(relativeCreated)d %(levelname)s %(message)s"))
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def dump(
+            self,
+            stream  #type: file
+        ):
+        """
+        This function writes the kept messages in stream, oldest first.
+        """
+        for record in list(self.records):
+            stream.write(self.format(record) + "\n")
+
+
+def setup_trace(
+        level = LOG_LEVEL,  #type: int
+        size = TRACE_SIZE   #type: int
+    ):
+    #type: (...) -> RingBufferHandler
+    """
+    It sets the level of the trace and keeps its messages in a ring buffer.
+    Warnings and errors are also written on stderr.
+    
+    @return The ring buffer handler
+    """
+    log.setLevel(level)
+    for h in list(log.handlers):
+        log.removeHandler(h)
+    ring = RingBufferHandler(size)
+    log.addHandler(ring)
+    console = logging.StreamHandler(sys.stderr)
+    console.setLevel(logging.WARNING)
+    log.addHandler(console)
+    log.propagate = False
+    return ring
+
+
+# The class `WallClock` gives the real time and really sleeps
+class WallClock:
+    def time(self):
+        """
+        This function returns the time (s) of a monotonic clock.
+        """
+        return monotonic()
+
+    def sleep(
+            self,
+            duration    #type: float
+        ):
+        if duration > 0:
+            time.sleep(duration)
+
+
+# The class `VirtualClock` gives a simulated time only advanced by sleep(), which returns at once
+class VirtualClock:
+    def __init__(
+            self,
+            start = 0.0 #type: float
+        ):
+        self.now = start
+
+    def time(self):
+        """
+        This function returns the virtual time (s).
+        """
+        return self.now
+
+    def sleep(
+            self,
+            duration    #type: float
+        ):
+        if duration > 0:
+            self.now += duration
+
+
+#clock of the model (scheduler, animations, time of the logs)
+clock = WallClock()
+
+
+def set_clock(
+        new_clock   #type: WallClock or VirtualClock
+    ):
+    """
+    It sets the clock used by the model.
+    """
+    global clock
+    clock = new_clock
+
 
 # Python program to get average of a list
 def mean(
@@ -200,6 +360,8 @@ class Motors:
             right = 0
         if not simulation:
             self.robot.send_data('D,' + str(left) + ',' + str(right))
+        elif self.robot.world is not None:
+            self.robot.world.drive(left, right)
                 
     def drive_lr(
             self, 
@@ -331,8 +493,6 @@ class Sensor:
             end,    #type: int
             robot
         ):
-        self.raw_val = [0] * size 
-        self.norm_val = [0.0] * size 
         self.name = name
         self.size = size
         self.s_char = s_char
@@ -340,9 +500,13 @@ class Sensor:
         self.min = min
         self.max = max
         self.inv = inv # True if the sensor is inverted (the greater the value, the smaller the data)
-        self.start = start
-        self.end = end
         self.robot = robot
+        #raw and normalized values of the start:end part, allocated once and updated in place
+        self.slice(start, end)
+        #errors of the commands reading the sensor (see Robot.request())
+        self.retries = 0    # commands sent again
+        self.timeouts = 0   # replies missing
+        self.malformed = 0  # replies too short, bad checksum, values not parsed or lost among other lines
 
     def get_name(self):
         """
@@ -376,6 +540,7 @@ class Sensor:
         @param size The size of the sensor.
         """
         self.size = size
+        self.slice(self.start, self.end)
 
     def slice(
             self, 
@@ -383,45 +548,62 @@ class Sensor:
             end    #type: int
         ):
         """
-        This function returns a slice of the sensor.
+        This function sets the part of the sensor kept from the data, and allocates its values.
         
         @param start The start of the slice.
         @param end The end of the slice.
-        @return The slice of the sensor.
         """
-        self.norm_val=self.norm_val[start:end]
-        self.raw_val=self.raw_val[start:end]
-        #self.size = len(self.norm_val)
+        self.start = start
+        self.end = end
+        kept = list(range(self.size))[start:end]
+        self.first = kept[0] if kept else 0 # index of the first kept value in the data of the sensor
+        self.count = len(kept)
+        self.raw_val = [0] * self.count
+        self.norm_val = [0.0] * self.count
+
+    def parse(
+            self,
+            data,       #type: list
+            offset = 1  #type: int
+        ):
+        """
+        This function sets the value of the sensor from decoded serial data.
+        
+        Only the start:end part is read, the values are written in place (nothing is allocated).
+        
+        @param data The decoded data received from the robot.
+        @param offset The index of the first value of the sensor in data.
+        """
+        raw_val = self.raw_val
+        norm_val = self.norm_val
+        first = offset + self.first
+        mn = self.min
+        scale = float(self.max - self.min)
+        for i in range(self.count):
+            #raw
+            x = int(data[first + i])
+            raw_val[i] = x
+            #normalized
+            norm_val[i] = (x - mn) / scale
+        if self.inv:
+            for i in range(self.count):
+                norm_val[i] = 1.0 - norm_val[i]
 
     def update(self, simulation = False):
         """
         This function updates the value of the sensor.
         """
-        if simulation:
+        if simulation and self.robot.world is not None:
+            self.parse(self.robot.world.sense(self.r_char), 0)
+        elif simulation:
                 for i in range(len(self.norm_val)):
                     self.raw_val[i] = random.randint(self.min, self.max)
                     self.norm_val[i] = ( (float(self.raw_val[i]) - self.min) / (self.max - self.min) )
         else:
-            success = 0
-            while(not success):
-                self.robot.send_data(self.s_char)
-                data = self.robot.get_data()
-                data.replace('\r\n', '')
-                if(data != None):
-                    data = self.robot.decode(data)
-                    if(data[0] == self.r_char):
-                        success=1
-                        self.raw_val = [0] * self.size 
-                        self.norm_val = [0.0] * self.size 
-                        for i in range(self.size):
-                            #normalized
-                            if self.inv:
-                                self.norm_val[i] = 1.0 - ((float(data[i+1])-self.min) / (self.max-self.min))
-                            else:
-                                self.norm_val[i] = ((float(data[i+1])-self.min) / (self.max-self.min))  
-                            #raw              
-                            self.raw_val[i] = int(data[i+1])
-                        self.slice(self.start, self.end)
+            #the previous values are kept if no valid reply came back
+            data = self.robot.request(self.s_char, self.r_char, self.first + self.count)
+            if data is not None:
+                self.parse(data)
 
 #The class `Nociceptor` defines a nociceptor
 class Nociceptor:
@@ -435,18 +617,20 @@ class Nociceptor:
         self.sensor = sensor  
         self.data = self.sensor.get_norm_val()[:]
         self.prev_data = self.sensor.get_norm_val()[:]
+        self.circular_scaling = CIRCULAR_SCALING
 
-    def compute_speed_impact(self):
+    def compute_speed_impact(self, dt = TIME_SLEEP):
         #A function that that takes data actual and previous value to compute
         #the value of the nociceptor as a speed
+        #dt is the time (s) elapsed since the previous data
         for i in range(len(self.data)):
             #compute dist and speed
             dist = abs(self.data[i] - self.prev_data[i])
-            speed = dist/TIME_SLEEP
+            speed = dist/dt
             #meaning of actual and previous speed to smooth data
             self.speed_val[i] = (speed + self.speed_val[i])/2
 
-    def compute_circular_impact(self):
+    def compute_circular_impact(self, dt = TIME_SLEEP):
         #a function that takes actual and previous value to compute the circular speed
         #speed is computed for each sensor as the difference between the actual and previous value of its neighbours
         l_dist = [0.0] * len(self.data)
@@ -475,7 +659,8 @@ class Nociceptor:
             #meaning
             self.circular_val[i] = (dist[i] + self.circular_val[i] )/ 2.0
             #compute speed
-            self.circular_val[i] = self.circular_val[i] * ((math.pi/6.0)*5.5)/TIME_SLEEP
+            if self.circular_scaling:
+                self.circular_val[i] = self.circular_val[i] * ((math.pi/6.0)*5.5)/dt
 
     def pain_irradiation(self):
         #
@@ -504,19 +689,100 @@ class Nociceptor:
     def get_val(self):
         return self.val[:]
 
-    def update(self):
+    def update(self, dt = TIME_SLEEP):
         self.prev_data = self.data[:]
         self.data = self.sensor.get_norm_val()[:]
         self.circular_val = self.circular_val[0:len(self.data)]
         self.speed_val = self.speed_val[0:len(self.data)]
         self.val = self.val[0:len(self.data)]
-        self.compute_speed_impact()
-        self.compute_circular_impact()
+        self.compute_speed_impact(dt)
+        self.compute_circular_impact(dt)
         for i in range(len(self.data)):
             self.val[i] = (self.speed_val[i] + self.circular_val[i])/2.0
         self.pain_irradiation()
 
 
+#irradiation kernels by size, shared by all the vectorized nociceptors
+NOCICEPTOR_KERNELS = {}
+
+
+def nociceptor_arrays(
+        size    #type: int
+    ):
+    """
+    It returns the arrays of a vectorized nociceptor of size sensors : index of the right and left
+    neighbours used by the circular speed, mask of the left neighbours and irradiation kernel.
+    The wrapping is the one of Nociceptor.compute_circular_impact() : the last sensor compares to
+    the first one on both sides and the first sensor has no left neighbour.
+
+    @return r_idx, l_idx, l_mask, kernel (the kernel is shared, not to be modified).
+    """
+    r_idx = np.arange(size) - 1
+    r_idx[0] = size - 1
+    r_idx[size - 1] = 0
+    l_idx = (np.arange(size) + 1) % size
+    l_mask = np.ones(size)
+    l_mask[0] = 0.0
+    if size not in NOCICEPTOR_KERNELS:
+        i = np.arange(size)
+        NOCICEPTOR_KERNELS[size] = np.exp(-((i[:, None] - i[None, :])**2)/2.0) / size
+    return r_idx, l_idx, l_mask, NOCICEPTOR_KERNELS[size]
+
+
+#The class `VectorNociceptor` is a NumPy version of `Nociceptor` giving the same values
+class VectorNociceptor(Nociceptor):
+
+    def __init__(        
+        self,
+        sensor,     #type: Sensor        
+        ):
+        self.val = np.zeros(sensor.size)
+        self.speed_val = np.zeros(sensor.size)
+        self.circular_val = np.zeros(sensor.size)
+        self.sensor = sensor  
+        self.data = np.array(self.sensor.get_norm_val(), dtype=float)
+        self.prev_data = self.data.copy()
+        self.circular_scaling = CIRCULAR_SCALING
+        self.resize(sensor.size)
+
+    def resize(self, size):
+        self.size = size
+        self.r_idx, self.l_idx, self.l_mask, self.kernel = nociceptor_arrays(size)
+
+    def compute_speed_impact(self, dt = TIME_SLEEP):
+        speed = np.abs(self.data - self.prev_data[:self.size]) / dt
+        self.speed_val = (speed + self.speed_val) / 2
+
+    def compute_circular_impact(self, dt = TIME_SLEEP):
+        r_dist = np.abs(self.data - self.data[self.r_idx])
+        l_dist = np.abs(self.data - self.data[self.l_idx]) * self.l_mask
+        self.circular_val = ((r_dist + l_dist)/2 + self.circular_val) / 2.0
+        #compute speed
+        if self.circular_scaling:
+            self.circular_val *= ((math.pi/6.0)*5.5)/dt
+
+    def pain_irradiation(self):
+        #gaussian irradiation as one product with the precomputed kernel
+        self.val = self.kernel.dot(self.val)
+
+    def get_val(self):
+        return self.val.tolist()
+
+    def update(self, dt = TIME_SLEEP):
+        self.prev_data = self.data
+        self.data = np.array(self.sensor.get_norm_val(), dtype=float)
+        if len(self.data) != self.size:
+            self.resize(len(self.data))
+            self.circular_val = self.circular_val[:self.size]
+            self.speed_val = self.speed_val[:self.size]
+        #the circular speed can overflow to inf like the floats of Nociceptor, without warning
+        with np.errstate(over="ignore", invalid="ignore"):
+            self.compute_speed_impact(dt)
+            self.compute_circular_impact(dt)
+            self.val = (self.speed_val + self.circular_val)/2.0
+            self.pain_irradiation()
+
+
 #The class `Stimulus` defines a stimulus
 class Stimulus:
     def  __init__(
@@ -721,6 +987,12 @@ class Behavior:
         for e in self.secondary_effects:
             e.impact()
 
+    def interrupt(self):
+        """
+        This function is called when another behavior is run instead of this one.
+        """
+        pass
+
 
 
 # The class `Appetititve` is an inherited class of behavior
@@ -759,8 +1031,75 @@ class Appettitive(Behavior):
         self.secondary_impact()
         
 
+# The class `MotorSequence` plays timed motor commands without blocking the main loop
+class MotorSequence:
+    def __init__(
+            self,
+            steps   #type: list
+        ):
+        """
+        @param steps The list of (action, duration) to play in order, action being a function setting the motors.
+        """
+        self.steps = steps
+        self.duration = sum(d for a, d in steps)
+        self.start_time = None
+
+    def start(
+            self,
+            now     #type: float
+        ):
+        """
+        This function starts the sequence from its first step.
+        """
+        self.start_time = now
+
+    def stop(self):
+        """
+        This function stops the sequence, the next start() plays it from its first step.
+        """
+        self.start_time = None
+
+    def is_running(
+            self,
+            now     #type: float
+        ):
+        """
+        This function returns True if the sequence was started and is not finished.
+        """
+        return self.start_time is not None and now - self.start_time < self.duration
+
+    def step(
+            self,
+            now     #type: float
+        ):
+        """
+        This function applies the action of the current step of the sequence.
+        
+        @return True if the sequence is still running, False otherwise.
+        """
+        if not self.is_running(now):
+            return False
+        elapsed = now - self.start_time
+        for action, d in self.steps:
+            if elapsed < d:
+                action()
+                break
+            elapsed -= d
+        return True
+
 # The class `Consumatory` is an inherited class of behavior
 class Consumatory(Behavior):
+    def __init__(
+            self, 
+            name,       #type: str
+            motors,     #type: Motors
+            stimulus,   #type: Stimulus
+            treshold,   #type: float
+        ):
+        Behavior.__init__(self, name, motors, stimulus, treshold)
+        #consumatory animation, advanced at each step this behavior is run, stopped when another one is run
+        self.animation = MotorSequence([(motors.turn_left, 0.2), (motors.turn_right, 0.2)])
+
     def can_behave(self):
         """
         The function can_consume takes in associated stimulus and check if mean is above a treshold
@@ -775,15 +1114,22 @@ class Consumatory(Behavior):
     def behave(self):
         """
         The function behave update thte assoociated var and lauch consumatory animation
+        The animation is not blocking: each call sets the motors for the current step of the animation
+        and the effects are applied once per animation, when it starts.
         """
-        if(self.main_effect != None):
-            self.main_impact()
-        self.secondary_impact()
+        now = clock.time()
+        if not self.animation.is_running(now):
+            if(self.main_effect != None):
+                self.main_impact()
+            self.secondary_impact()
+            self.animation.start(now)
+        self.animation.step(now)
 
-        self.motors.turn_left()
-        time.sleep(0.2)
-        self.motors.turn_right()
-        time.sleep(0.2)
+    def interrupt(self):
+        """
+        The function stops the animation, the next call of behave() applies the effects and plays it again.
+        """
+        self.animation.stop()
 
 # The class `Reflexive` is an inherited class of behavior
 class Reactive(Behavior):
@@ -1096,12 +1442,334 @@ class Hormone:
     def update_gland(self):
         self.release_rate = self.alpha * mean(self.nociceptor.get_val()) 
 
-    def update(self):
+    def update(self, dt = TIME_SLEEP):
+        #release and decay rates are given for a step of TIME_SLEEP, dt is the actual step (s)
         self.update_gland()
-        print(self.release_rate)
-        print(self.decay_rate)
-        print(self.concentration + self.release_rate - self.decay_rate)
-        self.concentration = max(0,min(1.0, self.concentration + self.release_rate - self.decay_rate))
+        self.concentration = max(0,min(1.0, self.concentration + (self.release_rate - self.decay_rate) * dt / TIME_SLEEP))
+        log.debug("%s release rate : %s | decay rate : %s | concentration : %s", self.name, self.release_rate, self.decay_rate, self.concentration)
+
+
+# The class `AsyncAcquisition` reads the sensors of a robot in a background thread
+class AsyncAcquisition:
+    def __init__(
+            self,
+            robot,      #type: Robot
+            depth = 1   #type: int
+        ):
+        """
+        The acquisition thread reads a frame each time a slot is free, at most depth frames
+        are waiting in the queue. Each frame is timestamped to know how old it is when used.
+        """
+        self.robot = robot
+        self.depth = depth
+        self.frames = queue.Queue(depth)
+        self.slots = threading.Semaphore(depth)
+        self.thread = None
+        self.running = False
+        self.error = None
+        self.staleness = 0.0        # age (s) of the last frame used
+        self.max_staleness = 0.0    # max age (s) of a used frame
+        self.sum_staleness = 0.0
+        self.used = 0               # frames used
+
+    def start(self):
+        """
+        This function starts the acquisition thread.
+        """
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="acquisition")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def run(self):
+        """
+        This function is the loop of the acquisition thread.
+        """
+        try:
+            while self.running:
+                self.slots.acquire()
+                if not self.running:
+                    break
+                raw = self.robot.acquire()
+                self.frames.put((time.time(), raw))
+        except Exception as error:
+            self.error = error
+            self.frames.put((time.time(), None))
+
+    def get(self):
+        """
+        This function returns the oldest acquired frame (waiting for it if needed)
+        and lets the thread read the next one.
+        
+        @return The raw data of the frame, as returned by Robot.acquire().
+        """
+        ts, raw = self.frames.get()
+        if raw is None:
+            raise self.error
+        self.slots.release()
+        self.staleness = time.time() - ts
+        self.max_staleness = max(self.max_staleness, self.staleness)
+        self.sum_staleness += self.staleness
+        self.used += 1
+        return raw
+
+    def mean_staleness(self):
+        """
+        This function returns the mean age (s) of the used frames.
+        """
+        if self.used == 0:
+            return 0.0
+        return self.sum_staleness / self.used
+
+    def stop(self):
+        """
+        This function stops the acquisition thread.
+        """
+        self.running = False
+        self.slots.release()
+        self.thread.join(1.0)
+
+
+# The class `DataLogger` writes rows of data in a csv file kept open during the run
+class DataLogger:
+    def __init__(
+            self,
+            filename,                   #type: str
+            max_rows = LOG_BUFFER_ROWS, #type: int
+            max_delay = LOG_BUFFER_TIME,#type: float
+            append = False              #type: bool
+        ):
+        """
+        Rows are formatted when written and kept in memory until max_rows rows are
+        waiting or the oldest one waits for more than max_delay seconds.
+        """
+        self.filename = filename
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.rows = []
+        self.first_row_time = 0.0
+        self.file = open(filename, "a+" if append else "w")
+
+    def write_header(
+            self,
+            columns #type: list
+        ):
+        """
+        This function writes the names of the columns.
+        
+        @param columns The names of the columns.
+        """
+        self.write(columns)
+
+    def write(
+            self,
+            values  #type: list
+        ):
+        """
+        This function formats a row and writes the buffered rows if needed.
+        
+        @param values The values of the row.
+        """
+        if not self.rows:
+            self.first_row_time = time.time()
+        self.rows.append(",".join([str(v) for v in values]))
+        if len(self.rows) >= self.max_rows or time.time() - self.first_row_time >= self.max_delay:
+            self.flush()
+
+    def flush(self):
+        """
+        This function writes the buffered rows in the file.
+        """
+        if self.rows:
+            self.file.write("\n".join(self.rows) + "\n")
+            self.rows = []
+        self.file.flush()
+
+    def close(self):
+        """
+        This function writes the buffered rows, syncs the file on disk and closes it.
+        """
+        self.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+
+
+# The class `ThreadedLogger` gives the rows to a `DataLogger` running in a background thread
+class ThreadedLogger:
+    def __init__(
+            self,
+            logger,                         #type: DataLogger or runlog.RunLogWriter
+            size = LOG_QUEUE_SIZE,          #type: int
+            policy = LOG_QUEUE_POLICY,      #type: str
+            timeout = LOG_QUEUE_TIMEOUT     #type: float
+        ):
+        """
+        Rows are put in a bounded queue emptied by the writer thread so a slow disk does not
+        delay the loop. When the queue is full the row is dropped ("drop") or the loop waits
+        at most timeout seconds before dropping it ("block").
+        """
+        self.logger = logger
+        self.filename = logger.filename
+        self.rows = queue.Queue(size)
+        self.policy = policy
+        self.timeout = timeout
+        #the rows are counted once : written at once, delayed (written after the loop waited) or dropped
+        self.dropped = 0    # rows not written, counted by both threads
+        self.delayed = 0    # rows written after the loop waited for the writer thread
+        self.counters = threading.Lock()
+        self.error = None   # exception which stopped the writing, the next rows are dropped
+        self.thread = threading.Thread(target=self.run, name="logger")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def write_header(
+            self,
+            columns #type: list
+        ):
+        """
+        This function queues the names of the columns, never dropped.
+        """
+        self.rows.put((self.logger.write_header, columns))
+
+    def write(
+            self,
+            values  #type: list
+        ):
+        """
+        This function queues a row for the writer thread.
+        
+        @param values The values of the row, not modified afterwards by the caller.
+        """
+        if self.error is not None:
+            self.drop()
+            return
+        try:
+            self.rows.put_nowait((self.logger.write, values))
+        except queue.Full:
+            if self.policy == "block":
+                try:
+                    self.rows.put((self.logger.write, values), True, self.timeout)
+                    self.delayed += 1
+                    return
+                except queue.Full:
+                    pass
+            self.drop()
+
+    def drop(self):
+        """
+        This function counts a row not written, from the loop or the writer thread.
+        """
+        with self.counters:
+            self.dropped += 1
+
+    def run(self):
+        """
+        This function is the loop of the writer thread.
+        After an error the queue is still emptied, the rows being dropped, until close().
+        """
+        while True:
+            try:
+                item = self.rows.get(True, self.logger.max_delay)
+            except queue.Empty:
+                item = False
+            if item is None:
+                break
+            if self.error is not None:
+                if item:
+                    self.drop()
+                continue
+            try:
+                if item:
+                    write, values = item
+                    write(values)
+                else:
+                    self.logger.flush()
+            except Exception as error:
+                self.error = error
+                if item:
+                    self.drop()
+                log.exception("log %s : writing stopped", self.filename)
+
+    def close(self):
+        """
+        This function waits for the queued rows to be written and closes the file.
+        An error of the writer thread is reported, not raised, so the robot is still stopped by the caller.
+        """
+        while self.thread.is_alive():
+            try:
+                self.rows.put(None, True, 0.1)
+                break
+            except queue.Full:
+                continue
+        self.thread.join()
+        try:
+            self.logger.close()
+        except Exception as error:
+            if self.error is None:
+                self.error = error
+            log.exception("log %s : closing failed", self.filename)
+
+
+# The class `Scheduler` runs the main loop at a fixed rate
+class Scheduler:
+    def __init__(
+            self,
+            period = TIME_SLEEP  #type: float
+        ):
+        """
+        Ticks are aligned on absolute deadlines (start + n * period) so the work done
+        in a tick does not delay the next ones. Overruns and jitter are recorded.
+        Time is read from the clock of the model: with a VirtualClock every tick lasts exactly period.
+        """
+        self.period = period
+        self.deadline = 0.0
+        self.last = 0.0
+        self.dt = period        # measured duration (s) of the last tick
+        self.jitter = 0.0       # lateness (s) of the last wake up
+        self.max_jitter = 0.0
+        self.sum_jitter = 0.0
+        self.overruns = 0       # ticks whose work went past the deadline
+        self.overrun = False    # the last tick went past its deadline
+        self.ticks = 0
+
+    def start(self):
+        """
+        This function sets the first deadline.
+        """
+        self.last = clock.time()
+        self.deadline = self.last + self.period
+
+    def wait(self):
+        """
+        This function sleeps until the deadline of the current tick.
+        If the tick overran, the missed deadlines are skipped.
+        
+        @return The measured duration (s) of the tick.
+        """
+        now = clock.time()
+        self.overrun = now >= self.deadline
+        if not self.overrun:
+            clock.sleep(self.deadline - now)
+        else:
+            self.overruns += 1
+            self.deadline += self.period * int((now - self.deadline) / self.period)
+        now = clock.time()
+        self.jitter = max(0.0, now - self.deadline)
+        self.max_jitter = max(self.max_jitter, self.jitter)
+        self.sum_jitter += self.jitter
+        self.ticks += 1
+        self.dt = now - self.last
+        self.last = now
+        self.deadline += self.period
+        return self.dt
+
+    def mean_jitter(self):
+        """
+        This function returns the mean jitter (s) of the ticks.
+        """
+        if self.ticks == 0:
+            return 0.0
+        return self.sum_jitter / self.ticks
 
 
 # The class `robot` defines the robot and its attributes
@@ -1112,10 +1780,14 @@ class Robot:
             port,       #type: str 
             baudrate,   #type: str
             simulation = False, #type: bool
+            buffered = True,    #type: bool
+            com = None          #type: cstm_serial.Transport
         ):
         """
         A class that defines the robot.
         @brief Class used to define the robot.
+        @param buffered use the chunked line reader of the serial port (select() instead of byte per byte reads)
+        @param com the transport to the robot (see transport.py), the serial port if None
         """
         #robot infos
         self.name = name
@@ -1129,6 +1801,8 @@ class Robot:
         self.variables = [Variable] * 0
         #sensors
         self.sensors = [Sensor] * 0
+        #sensors sharing the same command, read once per step
+        self.channels = OrderedDict()   #type : dict[tuple(str, str), list[Sensor]]
         #stimuli
         self.stimuli = [Stimulus] * 0
         #behaviors
@@ -1143,11 +1817,122 @@ class Robot:
         self.wellbeing_val = 0.0
         #pain
         self.pain = 0.0
+        #variant of the model (see VARIANTS)
+        self.cortisol = CORTISOL
+        self.pain_formula = PAIN_FORMULA
+        self.circular_scaling = CIRCULAR_SCALING
+        #sensor frame (one command for all sensors)
+        self.frame_s_char = None
+        self.frame_r_char = None
+        self.frame_layout = []  #type : list[tuple(str, int)]
+        self.frame_struct = None    #type : struct.Struct (binary frame only)
+        #background acquisition (None if sensors are read in the loop)
+        self.acquisition = None     #type : AsyncAcquisition
+        #serial port shared by the loop and the acquisition thread
+        self.com_lock = threading.RLock()
+        #data logger (opened by write_header_data() or save())
+        self.logger = None      #type : DataLogger, runlog.RunLogWriter or ThreadedLogger
+        #simulated robot in its arena (simulation mode only, random sensor values if None)
+        self.world = None       #type : simulator.SimulatedKhepera
+        #capture of the lines and frames read from the robot (None if not captured)
+        self.capture = None     #type : transport.SessionWriter
+        #timing of the stages of the steps (disabled by default)
+        self.tracer = tracing.NULL_TRACER   #type : tracing.Tracer or tracing.NullTracer
+        #behavior run at the last step
+        self.behavior = None    #type : Behavior
+        #scheduler of the run loop, its ticks are logged (None if the steps are not scheduled)
+        self.scheduler = None   #type : Scheduler
+        self.dt = TIME_SLEEP    #duration (s) of the previous step, given to update()
 
         #robot serial com
         if not simulation:
-            self.com = cstm_serial.SerialPort(port, baudrate)
+            self.com = com if com is not None else cstm_serial.SerialPort(port, baudrate, buffered)
+            self.com.timeout = REQUEST_TIMEOUT
         
+    def set_variant(
+            self,
+            name    #type: str
+        ):
+        """
+        The function sets the variant of the model: cortisol on or off, pain formula and
+        scaling of the circular speed of the nociceptor.
+        @param name A key of VARIANTS.
+        """
+        variant = VARIANTS[name]
+        self.cortisol = variant["cortisol"]
+        self.pain_formula = variant["pain_formula"]
+        self.circular_scaling = variant["circular_scaling"]
+        if isinstance(self.nociceptor, Nociceptor):
+            self.nociceptor.circular_scaling = self.circular_scaling
+
+    def set_world(
+            self,
+            world   #type: simulator.SimulatedKhepera
+        ):
+        """
+        The function sets the simulated robot used in simulation mode:
+        the sensors are read from its arena and the motor speeds are sent to it.
+        """
+        self.world = world
+
+    def set_tracer(
+            self,
+            tracer  #type: tracing.Tracer
+        ):
+        """
+        The function sets the tracer recording the timing of the steps.
+        """
+        self.tracer = tracer
+
+    def set_scheduler(
+            self,
+            scheduler   #type: Scheduler
+        ):
+        """
+        The function sets the scheduler of the run loop, whose last tick is saved with each step.
+        """
+        self.scheduler = scheduler
+
+    def start_capture(
+            self,
+            filename    #type: str
+        ):
+        """
+        The function starts capturing every line and frame read from the robot, with its time.
+        """
+        self.stop_capture()
+        self.capture = transport.SessionWriter(filename)
+
+    def stop_capture(self):
+        """
+        The function stops the capture and closes its file.
+        """
+        if self.capture is not None:
+            self.capture.close()
+            self.capture = None
+
+    def set_frame(
+            self,
+            s_char,         #type: str
+            r_char,         #type: str
+            layout,         #type: list
+            binary = False  #type: bool
+        ):
+        """
+        The function enables the acquisition of all sensors with a single frame command.
+        @param s_char The char sent to request the frame.
+        @param r_char The char beginning the reply.
+        @param layout The list of (r_char, size) of the sensor channels in the frame, in order.
+        @param binary True if the reply is a packed binary frame of little endian uint16 values
+        """
+        self.frame_s_char = s_char
+        self.frame_r_char = r_char
+        self.frame_layout = layout
+        if binary:
+            self.frame_struct = struct.Struct("<" + "".join(str(size) + "H" for r, size in layout))
+        else:
+            self.frame_struct = None
+
     def add_variable(
             self, 
             variable    #type: Variable
@@ -1164,9 +1949,14 @@ class Robot:
         ):
         """
         The function takes a sensor as argument and adds it to the list of sensors.
+        Sensors with the same s_char and r_char share the same channel.
         @param sensor The sensor to add.
         """
         self.sensors.append(sensor)
+        key = (sensor.s_char, sensor.r_char)
+        if key not in self.channels:
+            self.channels[key] = []
+        self.channels[key].append(sensor)
 
     def add_behavioral_system(
             self, 
@@ -1368,8 +2158,93 @@ class Robot:
         ):
         """
         The function defines a nociceptor
+        The NumPy version is used if VECTORIZED_NOCICEPTOR is True
         """
-        self.nociceptor = Nociceptor(sensor)
+        if VECTORIZED_NOCICEPTOR:
+            self.nociceptor = VectorNociceptor(sensor)
+        else:
+            self.nociceptor = Nociceptor(sensor)
+        self.nociceptor.circular_scaling = self.circular_scaling
+
+    def header_row(self):
+        """
+        This function returns the names of the columns saved at each step.
+        """
+        row = ["iter", "time"]
+        for v in self.variables:
+            row.append("val_" + v.get_name())
+        for v in self.variables:
+            row.append("def_" + v.get_name())
+        for s in self.stimuli:
+            row.append("stim_" + s.get_name())
+        for m in self.motivations:
+            row.append("mot_" + m.get_name())
+        row.append("motor_left")
+        row.append("motor_right")
+        for s in self.sensors:
+            for i in range(len(s.get_norm_val())):
+                row.append("sensor_" + s.get_name() + "_" + str(i))
+        for i in range(len(self.nociceptor.speed_val)):
+            row.append("speed_" + str(i))
+        for i in range(len(self.nociceptor.circular_val)):
+            row.append("circ_" + str(i))
+        for i in range(len(self.nociceptor.val)):
+            row.append("noci_" + str(i))
+        row.append("noci_mean")
+        row.append("gland_release_rate")
+        row.append("hormonal_concentration")
+        row.append("wellbeing")
+        row.append("pain")
+        for s in self.sensors:
+            row.append("retries_" + s.get_name())
+            row.append("timeouts_" + s.get_name())
+            row.append("malformed_" + s.get_name())
+        row.append("staleness")
+        row.append("dt")
+        row.append("jitter")
+        row.append("overrun")
+        return row
+
+    def data_row(
+            self, 
+            time,       #type: int
+            iter        #type: float
+        ):
+        """
+        This function returns the values saved at each step, in the order of header_row().
+        """
+        row = [iter, int(time)]
+        for v in self.variables:
+            row.append(v.get_value())
+        for v in self.variables:
+            row.append(v.get_error())
+        for s in self.stimuli:
+            row.append(mean(s.get_data()))
+        for m in self.motivations:
+            row.append(m.get_intensity())
+        row.append(self.motors.get_left_speed())
+        row.append(self.motors.get_right_speed())
+        for s in self.sensors:
+            row.extend(s.get_norm_val())
+        row.extend(self.nociceptor.speed_val)
+        row.extend(self.nociceptor.circular_val)
+        row.extend(self.nociceptor.val)
+        row.append(mean(self.nociceptor.val))
+        row.append(self.cortisol_hormone.release_rate)
+        row.append(self.cortisol_hormone.concentration)
+        row.append(self.wellbeing_val)
+        row.append(self.pain)
+        for s in self.sensors:
+            row.append(s.retries)
+            row.append(s.timeouts)
+            row.append(s.malformed)
+        #age (s) of the sensor values used by the step, 0 if read in the step
+        row.append(self.acquisition.staleness if self.acquisition is not None else 0.0)
+        #tick before the step : its duration, the lateness of its wake up and 1 if it overran
+        row.append(self.dt)
+        row.append(self.scheduler.jitter if self.scheduler is not None else 0.0)
+        row.append(int(self.scheduler.overrun) if self.scheduler is not None else 0)
+        return row
 
     def write_header_data(
             self, 
@@ -1377,40 +2252,13 @@ class Robot:
         ):
         """
         This function writes the header data to the file
+        The file is kept open by the logger of the robot until close_log() is called.
         
         @param filename the name of the file to write to
-        
-        @return The iter+1 is being returned.
-        """
-        with open(filename, "w") as file:
-            file.write("iter" +  ",")
-            file.write("time" +  ",")
-            for v in self.variables:
-                file.write("val_" + v.get_name() + ",")
-            for v in self.variables:
-                file.write("def_" + v.get_name() + ",")
-            for s in self.stimuli:
-                file.write("stim_" + s.get_name() +  ",")
-            for m in self.motivations:
-                file.write("mot_" + m.get_name() + ",")
-            file.write("motor_left" + ",")
-            file.write("motor_right"+",")
-            for s in self.sensors:
-                for i in range(len(s.get_norm_val())):
-                    file.write("sensor_" + s.get_name() + "_" + str(i) + ",")
-            for i in range(len(self.nociceptor.speed_val)):
-                file.write("speed_" + str(i) + ",")
-            for i in range(len(self.nociceptor.circular_val)):
-                file.write("circ_" + str(i) + ",")
-            for i in range(len(self.nociceptor.val)):
-                file.write("noci_" + str(i) + ",")
-            file.write("noci_mean" + ",")
-            file.write("gland_release_rate" + ",")
-            file.write("hormonal_concentration" + ",")
-            file.write("wellbeing" + ",")
-            file.write("pain")
-            file.write("\n")
-
+        """
+        self.close_log()
+        self.open_log(filename)
+        self.logger.write_header(self.header_row())
 
     def save(
             self, 
@@ -1423,36 +2271,39 @@ class Robot:
         @param filename The name of the file.
         @return iteration
         """
-        with open(filename, "a+") as file:
-            file.write(str(iter) + ",")
-            file.write(str(int(time)) + ",")
-            for v in self.variables:
-                file.write(str(v.get_value()) + ",")
-            for v in self.variables:
-                file.write(str(v.get_error()) + ",")
-            for s in self.stimuli:
-                file.write(str(mean(s.get_data())) + ",")
-            for m in self.motivations:
-                file.write(str(m.get_intensity()) + ",")
-            file.write(str(self.motors.get_left_speed()) + ",")
-            file.write(str(self.motors.get_right_speed())+",")
-            for s in self.sensors:
-                for i in range(len(s.get_norm_val())):
-                    file.write(str(s.get_norm_val()[i]) + ",")
-            for i in range(len(self.nociceptor.speed_val)):
-                file.write(str(self.nociceptor.speed_val[i])+",")
-            for i in range(len(self.nociceptor.circular_val)):
-                file.write(str(self.nociceptor.circular_val[i])+",")
-            for i in range(len(self.nociceptor.val)):
-                file.write(str(self.nociceptor.val[i])+",")
-            file.write(str(mean(self.nociceptor.val))+",")
-            file.write(str(self.cortisol_hormone.release_rate)+",")
-            file.write(str(self.cortisol_hormone.concentration)+",")
-            file.write(str(self.wellbeing_val)+",")
-            file.write(str(self.pain))
-            file.write("\n")
+        if self.logger is None or self.logger.filename != filename:
+            self.close_log()
+            self.open_log(filename, append = True)
+        self.logger.write(self.data_row(time, iter))
         return iter+1        
 
+    def open_log(
+            self,
+            filename,       #type: str
+            append = False  #type: bool
+        ):
+        """
+        The function opens the log file in the LOG_FORMAT format, written in a background thread if LOG_THREAD is True.
+        """
+        if LOG_FORMAT == "rlog":
+            self.logger = runlog.RunLogWriter(filename, LOG_BUFFER_ROWS, LOG_BUFFER_TIME, append)
+        else:
+            self.logger = DataLogger(filename, append = append)
+        if LOG_THREAD:
+            self.logger = ThreadedLogger(self.logger)
+
+    def close_log(self):
+        """
+        The function writes the buffered rows and closes the log file.
+        """
+        if self.logger is not None:
+            self.logger.close()
+            if isinstance(self.logger, ThreadedLogger) and (self.logger.dropped or self.logger.delayed):
+                print("log : " + str(self.logger.dropped) + " rows dropped | " + str(self.logger.delayed) + " rows delayed")
+            if isinstance(self.logger, ThreadedLogger) and self.logger.error is not None:
+                print("log : write error : " + str(self.logger.error))
+            self.logger = None
+
     def WTA(self):
         #type : () -> Motivation
         if len(self.motivations)>0:
@@ -1507,11 +2358,9 @@ class Robot:
         string sent to robot is as follows : "K, lr,lg,lb,rr,rg,rb,br,bg,bb"
         """
         if not simulation:
-            print("----------------------LED---------------------------")
             str = "K," + self.get_left_led().toStr() + "," + self.get_right_led().toStr() + "," + self.get_back_led().toStr()
-            print(str)
+            log.debug("leds : %s", str)
             self.send_data(str)
-            print("----------------------------------------------------")
 
     def die(self, simulation = False):
         if not simulation:
@@ -1527,68 +2376,101 @@ class Robot:
         self.wellbeing_val = 1.0 - sum/len(self.variables)
 
     def update_pain(self):
-        self.pain = max(0.0,min(1.0, mean(self.nociceptor.val[:]) * (1 + 0.2*(1.0-self.wellbeing_val) + self.cortisol_hormone.concentration)))
+        if self.pain_formula == "constant":
+            self.pain = max(0.0,min(1.0, mean(self.nociceptor.val[:]) * (1.02)))
+        else:
+            self.pain = max(0.0,min(1.0, mean(self.nociceptor.val[:]) * (1 + 0.2*(1.0-self.wellbeing_val) + self.cortisol_hormone.concentration)))
+
 
+    def behave(
+            self,
+            motivation  #type: Motivation
+        ):
+        """
+        The function runs the first behavior able to behave of the behavioral system of the motivation
+        and sets the back led to its color. The behavior run at the previous step is interrupted if it is not run again.
+        @param motivation The selected motivation.
+        """
+        selected = None
+        #first we get througt all the behavioral systems
+        for b_s in self.behavior_systems:
+            #if a behavioral system corresponds to the selected motivation
+            if(b_s.get_drive() == motivation.get_drive()):
+                log.debug("b_s selected : %s", b_s.name)
+                for b in b_s.get_behaviors():
+                    if(b.can_behave()):
+                        log.debug("behavior selected : %s", b.name)
+                        b.behave()
+                        if b.get_name() == "cool-down":
+                            self.get_back_led().set_led("blue")
+                        elif b.get_name() == "seek-shade":
+                            self.get_back_led().set_led("cyan")
+                        elif b.get_name() == "eat":
+                            self.get_back_led().set_led("red")
+                        elif b.get_name() == "seek-food":
+                            self.get_back_led().set_led("magenta")
+                        elif b.get_name() == "withdraw":                                
+                            self.get_back_led().set_led("white")
+                        else:
+                            self.get_back_led().set_led("green")
+                        selected = b
+                        break
+        if self.behavior is not None and self.behavior is not selected:
+            self.behavior.interrupt()
+        self.behavior = selected
 
-    def update(self, debug = False, simulation = False):
+    def update(self, debug = False, simulation = False, dt = TIME_SLEEP):
         """
         The update function updates the state of the robot
-        """
+        @param dt The measured duration (s) of the previous step
+        """
+        self.dt = dt
+        if self.capture is not None:
+            self.capture.record(transport.STEP, transport.STEP_DT.pack(dt))
+        #move the simulated robot with the motor speeds of the previous step
+        if simulation and self.world is not None:
+            self.world.step(dt)
+            self.tracer.mark("arena")
         #update sensors
-        for s in self.sensors:
-            s.update(simulation)
+        self.update_sensors(simulation)
+        self.tracer.mark("parse")
         #update physiological variables
         for v in self.variables:
             v.update()
         #update leds for variables
         self.get_left_led().set_led_intensity("blue", self.variables[1].get_value())
         self.get_right_led().set_led_intensity("red", self.variables[0].get_value())
+        self.tracer.mark("variables")
         #update reactive stimulus
         for s in self.stimuli:
             s.update()        
+        self.tracer.mark("stimuli")
         #update motivations
         for m in self.motivations:
             m.update()
+        self.tracer.mark("motivations")
         #nociceptor update
-        self.nociceptor.update()
+        self.nociceptor.update(dt)
+        self.tracer.mark("nociceptor")
         #gland and hormone update
-        self.cortisol_hormone.update()
+        if self.cortisol:
+            self.cortisol_hormone.update(dt)
+        self.tracer.mark("hormone")
         #Internal state update
         self.wellbeing()
         #pain
         self.update_pain()        
+        self.tracer.mark("wellbeing")
 
 
         #select motivation
         selected_mot = self.WTA()
+        self.tracer.mark("wta")
         
-        print("selected_mot : " + selected_mot.get_name())
-        print("selected drive " + str(selected_mot.get_drive().get_name()))
-        print ("------")
+        log.debug("selected_mot : %s | selected drive : %s", selected_mot.name, selected_mot.drive.name)
         #select behavior
-        #first we get througt all the behavioral systems
-        for b_s in self.behavior_systems:
-            #if a behavioral system corresponds to the selected motivation
-            if(b_s.get_drive() == selected_mot.get_drive()):
-                print("b_s selected: " + b_s.get_name())
-                for b in b_s.get_behaviors():
-                    if(b.can_behave()):
-                        print("behavior selected: " + b.get_name())
-                        print ("---")
-                        b.behave()
-                        if b.get_name() == "cool-down":
-                            self.get_back_led().set_led("blue")
-                        elif b.get_name() == "seek-shade":
-                            self.get_back_led().set_led("cyan")
-                        elif b.get_name() == "eat":
-                            self.get_back_led().set_led("red")
-                        elif b.get_name() == "seek-food":
-                            self.get_back_led().set_led("magenta")
-                        elif b.get_name() == "withdraw":                                
-                            self.get_back_led().set_led("white")
-                        else:
-                            self.get_back_led().set_led("green")
-                        break
+        self.behave(selected_mot)
+        self.tracer.mark("behavior")
 
 
         #effect on system
@@ -1603,6 +2485,7 @@ class Robot:
 
         #led update
         self.update_leds(simulation)
+        self.tracer.mark("actuators")
 
 
     def decode(self, data):
@@ -1615,32 +2498,258 @@ class Robot:
         decoded = data.split(",")
         return decoded
         
-    def get_data(self):
+    def count_error(
+            self,
+            s_char,     #type: str
+            r_char,     #type: str
+            counter     #type: str
+        ):
+        """
+        The function counts an error of a command for every sensor read by the command.
+        @param counter "retries", "timeouts" or "malformed"
+        """
+        if s_char == self.frame_s_char:
+            r_chars = [r for r, size in self.frame_layout]
+        else:
+            r_chars = [r_char]
+        for key, sensors in self.channels.items():
+            if key[1] in r_chars:
+                for s in sensors:
+                    setattr(s, counter, getattr(s, counter) + 1)
+
+    def request(
+            self,
+            s_char,     #type: str
+            r_char,     #type: str
+            size = 0    #type: int
+        ):
+        """
+        The function sends a command and waits for its reply.
+        Lines not starting with r_char (acknowledgments of previous commands) are skipped, at most REQUEST_SKIPPED,
+        an attempt waiting at most REQUEST_TIMEOUT for all its lines. If the reply is missing or has less than size values,
+        the stale input is drained and the command sent again, at most REQUEST_RETRIES times.
+        Errors are counted by the sensors of the command.
+        @param s_char The command sent to the robot.
+        @param r_char The char beginning the expected reply.
+        @param size The number of values expected in the reply.
+        @return The decoded reply, None if no valid reply came back.
+        """
+        #the same tracer for the start and the end of the spans, even if set meanwhile
+        tracer = self.tracer
+        with self.com_lock:
+            for attempt in range(REQUEST_RETRIES + 1):
+                if attempt > 0:
+                    self.count_error(s_char, r_char, "retries")
+                    self.com.drain()
+                t0 = tracer.now()
+                self.send_data(s_char)
+                t1 = tracer.now()
+                tracer.span("serial-send", t0, t1)
+                deadline = time.time() + REQUEST_TIMEOUT
+                data = self.get_data(REQUEST_TIMEOUT)
+                tracer.span("serial-receive", t1)
+                skipped = 0
+                while data and skipped <= REQUEST_SKIPPED:
+                    data = self.decode(data)
+                    if data[0] == r_char:
+                        if len(data) > size:
+                            return data
+                        self.count_error(s_char, r_char, "malformed")
+                        break
+                    skipped += 1
+                    #once the deadline is past, only the lines already received are read
+                    data = self.get_data(max(0.0, deadline - time.time()))
+                else:
+                    #lines kept coming without the reply : the replies are out of step, not late
+                    self.count_error(s_char, r_char, "malformed" if data else "timeouts")
+            log.warning("no valid reply to %s after %d retries", s_char, REQUEST_RETRIES)
+            return None
+
+    def request_binary(
+            self,
+            s_char, #type: str
+            r_char  #type: str
+        ):
+        """
+        The function sends a command and waits for its binary reply, at most REQUEST_TIMEOUT.
+        If no valid frame comes back, the stale input is drained and the command sent again,
+        at most REQUEST_RETRIES times. Errors are counted by the sensors of the frame.
+        @param s_char The command sent to the robot.
+        @param r_char The header byte of the binary frame.
+        @return The payload of the frame, None if no valid frame came back.
+        """
+        #the same tracer for the start and the end of the spans, even if set meanwhile
+        tracer = self.tracer
+        with self.com_lock:
+            for attempt in range(REQUEST_RETRIES + 1):
+                if attempt > 0:
+                    self.count_error(s_char, r_char, "retries")
+                    self.com.drain()
+                t0 = tracer.now()
+                self.send_data(s_char)
+                t1 = tracer.now()
+                tracer.span("serial-send", t0, t1)
+                bad_frames = self.com.bad_frames
+                payload = self.com.read_frame(r_char, REQUEST_TIMEOUT)
+                tracer.span("serial-receive", t1)
+                if self.capture is not None:
+                    self.capture.record(transport.FRAME, payload or b"")
+                if payload is not None and len(payload) >= self.frame_struct.size:
+                    return payload
+                if payload is not None or self.com.bad_frames != bad_frames:
+                    self.count_error(s_char, r_char, "malformed")
+                else:
+                    self.count_error(s_char, r_char, "timeouts")
+            log.warning("no valid frame for %s after %d retries", s_char, REQUEST_RETRIES)
+            return None
+
+    def acquire(self):
+        """
+        The function acquires the raw data of one step, each command being sent once:
+        the frame command if any, then the channels missing from the frame.
+        Channels without a valid reply are left out, their sensors keep their values.
+        @return A dict giving for each channel the decoded reply and the index of the first value of the channel in it.
+        """
+        raw = OrderedDict()
+        framed = set()
+        if self.frame_s_char is not None:
+            if self.frame_struct is not None:
+                payload = self.request_binary(self.frame_s_char, self.frame_r_char)
+                data = self.frame_struct.unpack_from(payload) if payload is not None else None
+                offset = 0
+            else:
+                data = self.request(self.frame_s_char, self.frame_r_char, sum(size for r, size in self.frame_layout))
+                offset = 1
+            for r_char, size in self.frame_layout:
+                for key in self.channels:
+                    if key[1] == r_char:
+                        framed.add(key)
+                        if data is not None:
+                            raw[key] = (data, offset)
+                offset += size
+        for key in self.channels:
+            if key not in framed:
+                data = self.request(key[0], key[1], max(s.first + s.count for s in self.channels[key]))
+                if data is not None:
+                    raw[key] = (data, 1)
+        return raw
+
+    def dispatch(
+            self,
+            raw     #type: dict
+        ):
+        """
+        The function gives the raw data of each channel to every sensor of the channel,
+        each sensor keeping only its own start:end part.
+        @param raw The raw data returned by acquire().
+        """
+        for key, (data, offset) in raw.items():
+            for s in self.channels[key]:
+                try:
+                    s.parse(data, offset)
+                except ValueError:
+                    s.malformed += 1
+
+    def read_frame(self):
+        """
+        The function acquires all the sensors with one frame command and gives
+        each part of the frame to every sensor reading this channel.
+        Channels missing from the frame layout are read on their own.
+        """
+        self.dispatch(self.acquire())
+
+    def start_acquisition(
+            self,
+            depth = 1   #type: int
+        ):
+        """
+        The function starts the acquisition of the sensors in a background thread,
+        the next frame being read while the model computes on the current one.
+        @param depth The number of frames acquired in advance.
+        """
+        self.acquisition = AsyncAcquisition(self, depth)
+        self.acquisition.start()
+
+    def stop_acquisition(self):
+        """
+        The function stops the background acquisition.
+        """
+        if self.acquisition is not None:
+            self.acquisition.stop()
+            self.acquisition = None
+
+    def update_sensors(self, simulation = False):
+        """
+        The function updates all the sensors, each command being sent once per step.
+        """
+        if simulation and self.world is not None:
+            self.dispatch(OrderedDict((key, (self.world.sense(key[1]), 0)) for key in self.channels))
+        elif simulation:
+            for s in self.sensors:
+                s.update(simulation)
+        elif self.acquisition is not None:
+            raw = self.acquisition.get()
+            self.tracer.mark("serial")
+            self.dispatch(raw)
+        else:
+            raw = self.acquire()
+            self.tracer.mark("serial")
+            self.dispatch(raw)
+
+    def get_data(
+            self,
+            timeout = None  #type: float
+        ):
         """
         The function get_data() returns the data of the robot.
+        @param timeout The max time (s) waiting for the line, the timeout of the serial port if None.
         @return The data of the robot via serial port.
         """
-        return self.com.read_until('\n')
+        data = self.com.read_until('\n', timeout)
+        if self.capture is not None:
+            self.capture.record(transport.LINE, data)
+        return data
 
     def send_data(self, data):
         """
         function that send data via serial port
         """
-        self.com.write(data + '\n')
+        with self.com_lock:
+            self.com.write(data + '\n')
 
 ############################################################################################################
 ########################################## MAIN CODE #######################################################
 ############################################################################################################
 
-def define_khepera(simulation = False):
+def define_khepera(
+        simulation = False,         #type: bool
+        food_bounds = (940, 955),   #type: tuple
+        shade_bounds = (400, 555),  #type: tuple
+        seed = None,                #type: int
+        variant = VARIANT           #type: str
+    ):
     #type: (...) -> Robot
     """
     We create a robot called khepera, add variables, sensors, stimuli, drives, motivations, effects, and
     behavioral systems
     
+    @param food_bounds (lower, upper) raw bounds of the food stimulus
+    @param shade_bounds (lower, upper) raw bounds of the shade stimulus
+    @param seed The seed of the simulated arena (simulation mode or "mock" transport)
+    @param variant The variant of the model, a key of VARIANTS
     @return A robot object
     """
-    khepera = Robot("khepera-iv", '/dev/ttyS1', 115200, simulation)
+    #link to the robot
+    com = None
+    if not simulation:
+        arena = None
+        if TRANSPORT == "mock":
+            arena = simulator.default_arena(sum(food_bounds) // 2, sum(shade_bounds) // 2, seed = seed)
+        com = transport.open_transport(TRANSPORT, '/dev/ttyS1', 115200, arena = arena, latency = TRANSPORT_LATENCY,
+                                       clock = lambda: clock.time(), filename = TRANSPORT_FILE, record = TRANSPORT_RECORD,
+                                       realtime = REPLAY_SPEED == "real")
+    khepera = Robot("khepera-iv", '/dev/ttyS1', 115200, simulation, com = com)
+    khepera.set_variant(variant)
     #add variables
     khepera.add_variable(Variable("energy", 0.5, 1.0, 0.05, True, 0.01))
     khepera.add_variable(Variable("temperature", 0.5, 0.0, 0.05, False, 0.01))
@@ -1649,14 +2758,21 @@ def define_khepera(simulation = False):
     khepera.add_sensor(Sensor("us", N_US_SENSORS, 'G', 'g', 0, 1000, 1, 0, N_US_SENSORS, khepera))
     khepera.add_sensor(Sensor("prox", N_IR_SENSORS, 'N', 'n', 0, 1023, 0, 0, 7, khepera))
     khepera.add_sensor(Sensor("gnd", N_IR_SENSORS, 'N', 'n', 0, 1023, 1, 8, 12, khepera))
+    #all sensors in one frame
+    if BINARY_FRAME:
+        khepera.set_frame('X', 'x', [('g', N_US_SENSORS), ('n', N_IR_SENSORS), ('o', N_IR_SENSORS)], True)
+    else:
+        khepera.set_frame('Q', 'q', [('g', N_US_SENSORS), ('n', N_IR_SENSORS)])
     #add our stimuli
-    lower_bound_food = int(sys.argv[2]) if len(sys.argv) > 2 else 940
-    upper_bound_food = int(sys.argv[3]) if len(sys.argv) > 3 else 955
+    lower_bound_food, upper_bound_food = food_bounds
     khepera.add_stimulus(Stimulus("food", khepera.get_sensor_by_name("gnd"), lower_bound_food, upper_bound_food, False))
-    lower_bound_shade = int(sys.argv[4]) if len(sys.argv) > 4 else 400
-    upper_bound_shade = int(sys.argv[5]) if len(sys.argv) > 5 else 555
+    lower_bound_shade, upper_bound_shade = shade_bounds
     khepera.add_stimulus(Stimulus("shade", khepera.get_sensor_by_name("gnd"), lower_bound_shade, upper_bound_shade, False))
     khepera.add_stimulus(Stimulus("wall", khepera.get_sensor_by_name("prox"), 0, 1023, False))
+    #simulated arena with the ground values in the middle of the stimuli bounds
+    if simulation and SIMULATOR:
+        arena = simulator.default_arena((lower_bound_food + upper_bound_food) // 2, (lower_bound_shade + upper_bound_shade) // 2, seed = seed)
+        khepera.set_world(simulator.SimulatedKhepera(arena))
     #declare drives
     dr_increase_energy = Drive("increase-energy",True, khepera.get_var_by_name("energy"))
     dr_decrease_temperature = Drive("decrease-temperature", False, khepera.get_var_by_name("temperature"))
@@ -1715,6 +2831,65 @@ def define_khepera(simulation = False):
 
     return khepera
 
+def dashboard(
+        robot,          #type: Robot
+        i,              #type: int
+        t,              #type: int
+        level = "full"  #type: str
+    ):
+    """
+    It returns the lines displaying the robot's attributes
+    
+    @param robot the robot object
+    @param level "summary" for time, variables, pain, motivations and motors or "full" for everything
+    """
+    f = "{0:0.2f}".format
+    lines = []
+    lines.append("-------------------INFO-----------------------------")
+    lines.append("time : " + f(float(t/1000)) + "s")
+    lines.append("iter : " + str(i))
+    if level == "full":
+        lines.append("Robot name      : " + robot.name)
+        lines.append("Serial          : " + robot.port + " | bps : " + str(robot.baudrate))
+        lines.append("Serial errors   : " + " | ".join(s.name + " " + str(s.retries) + "/" + str(s.timeouts) + "/" + str(s.malformed) for s in robot.sensors) + " (retries/timeouts/malformed)")
+        if robot.acquisition is not None:
+            a = robot.acquisition
+            lines.append("Sensor age      : " + f(a.staleness * 1000) + "ms | mean " + f(a.mean_staleness() * 1000) + "ms | max " + f(a.max_staleness * 1000) + "ms")
+        if robot.world is not None:
+            w = robot.world
+            lines.append("Arena           : x " + f(w.x) + " | y " + f(w.y) + " | theta " + f(w.theta) + " | collisions " + str(w.collisions))
+    lines.append("-------------------VAL------------------------------")
+    for v in robot.variables:
+        lines.append(v.name + " : " + f(v.get_value()) + " | error : " + f(v.get_error()))
+    if level == "full":
+        lines.append("-----------------RAW SENSORS------------------------")
+        for s in robot.sensors:
+            lines.append(s.name + " :  " + str([i for i in s.get_raw_val()]))
+        lines.append("-------------------SENSORS--------------------------")
+        for s in robot.sensors:
+            lines.append(s.name + " :  " + str([f(i) for i in s.get_norm_val()]))
+        lines.append("-------------------STIMULI--------------------------")
+        for s in robot.stimuli:
+            lines.append(s.name + " :  " + f(mean(s.get_data())) + "   " + str([f(i) for i in s.get_data()]))
+        lines.append("--------------------NOCICEPTOR----------------------")
+        lines.append("speed      :  " + str([f(i) for i in robot.nociceptor.speed_val]))
+        lines.append("circular   :  " + str([f(i) for i in robot.nociceptor.circular_val]))
+        lines.append("nociceptor :  " + str([f(i) for i in robot.nociceptor.val]))
+        lines.append("---------------------cortisol-------------------------")
+        lines.append("nociceptor mean      :  " + f(mean(robot.nociceptor.val[:])))
+        lines.append("gland release rate   :  " + f(robot.cortisol_hormone.release_rate))
+        lines.append("hormone concetration :  " + f(robot.cortisol_hormone.concentration))
+    lines.append("---------------------PAIN---------------------------")
+    lines.append("Pain :  " + f(robot.pain))
+    lines.append("-------------------MOTIVATIONS----------------------")
+    for m in robot.motivations:
+        lines.append(m.name + " : " + f(m.get_intensity()))
+    lines.append("---------------------MOTORS-------------------------")
+    lines.append("left : " + f(robot.get_motors().get_left_speed()) + " | right : " + f(robot.get_motors().get_right_speed()))
+    lines.append("----------------------------------------------------")
+    lines.append("")
+    return lines
+
 def display(
         robot,  #type: Robot
         i,      #type: int
@@ -1725,141 +2900,215 @@ def display(
     
     @param robot the robot object
     """
-    os.system('clear')
-    print("-------------------INFO-----------------------------")
-    print("time : " + "{0:0.2f}".format(float(t/1000)) + "s")
-    print("iter : " + str(i))
-    print("Robot name      : " + robot.name)
-    print("Serial          : " + robot.port + " | bps : " + str(robot.baudrate))
-    print("-------------------VAL------------------------------")
-    for v in robot.variables:
-        print(v.name + " : " + "{0:0.2f}".format(v.get_value()) + " | error : " + "{0:0.2f}".format(v.get_error()))
-    print("-----------------RAW SENSORS------------------------")
-    for s in robot.sensors:
-        print(s.name + " : ",  [i for i in s.get_raw_val()])
-    print("-------------------SENSORS--------------------------")
-    for s in robot.sensors:
-        print(s.name + " : ",  ["{0:0.2f}".format(i) for i in s.get_norm_val()])
-    print("-------------------STIMULI--------------------------")
-    for s in robot.stimuli:
-        print(s.name + " : ", "{0:0.2f}".format(mean(s.get_data())), " " , ["{0:0.2f}".format(i) for i in s.get_data()])
-    print("--------------------NOCICEPTOR----------------------")
-    print("speed      : ", ["{0:0.2f}".format(i) for i in robot.nociceptor.speed_val])
-    print("circular   : ", ["{0:0.2f}".format(i) for i in robot.nociceptor.circular_val])
-    print("nociceptor : ", ["{0:0.2f}".format(i) for i in robot.nociceptor.val])
-    print("---------------------cortisol-------------------------")
-    print("nociceptor mean      : ", "{0:0.2f}".format(mean(robot.nociceptor.val[:])))
-    print("gland release rate   : ", "{0:0.2f}".format(robot.cortisol_hormone.release_rate))
-    print("hormone concetration : ", "{0:0.2f}".format(robot.cortisol_hormone.concentration))
-    print("---------------------PAIN---------------------------")
-    print("Pain : ", "{0:0.2f}".format(robot.pain))
-    print("-------------------MOTIVATIONS----------------------")
-    for m in robot.motivations:
-        print(m.name + " : " + "{0:0.2f}".format(m.get_intensity()))
-    print("---------------------MOTORS-------------------------")
-    print("left : " + "{0:0.2f}".format(robot.get_motors().get_left_speed()) + " | right : " + "{0:0.2f}".format(robot.get_motors().get_right_speed()))
-    print("----------------------------------------------------")
-    print("")
+    sys.stdout.write(ANSI_CLEAR + "\n".join(dashboard(robot, i, t)) + "\n")
+    sys.stdout.flush()
+
+# The class `Display` refreshes the terminal dashboard at a lower rate than the main loop
+class Display:
+    def __init__(
+            self,
+            level = DISPLAY_LEVEL,      #type: str
+            period = DISPLAY_PERIOD     #type: float
+        ):
+        """
+        @param level "off", "summary" or "full"
+        @param period The minimum time (s) between two refreshes.
+        """
+        self.level = level
+        self.period = period
+        self.last = None
 
+    def update(
+            self,
+            robot,  #type: Robot
+            i,      #type: int
+            t       #type: int
+        ):
+        """
+        This function redraws the dashboard if it is enabled and was not refreshed for period seconds.
+        The screen is redrawn in place with ANSI escape codes in a single write.
+        """
+        if self.level == "off":
+            return
+        now = monotonic()   #real time, even with a virtual clock
+        if self.last is not None and now - self.last < self.period:
+            return
+        self.last = now
+        sys.stdout.write(ANSI_CLEAR + "\n".join(dashboard(robot, i, t, self.level)) + "\n")
+        sys.stdout.flush()
 
 # MAIN CODE
 # ----------------------------------------------------------------------------------------------------------------------
-if not sys.argv[1] or sys.argv[1] == "-h":
-    print("usage : model.py -[option] [lower_bound_food] [upper_bound_food] [lower_bound_shade] [upper_bound_shade] [name_of_file (without extension)]")
-    print("options :")
-    print("\t-r: run")
-    print("\t-d: debug")
-    print("\t-s: simulation")
-    print("\t-m : manual")
-    print("\t-h : help")
-    print("values :")
-    print("\tlower_bound_food : lower bound of the food stimulus - def 940")
-    print("\tupper_bound_food : upper bound of the food stimulus - def 955")
-    print("\tlower_bound_shade : lower bound of the shade stimulus - def 450")
-    print("\tupper_bound_shade : upper bound of the shade stimulus - def 550")
-    print("\tname_of_file : name of the file where the data will be saved - def data.csv")
-    print("example : ")
-    print('\tmodel.py -r 940 955 450 550 "expriment_1"')
-    exit(0)
-elif ((sys.argv[1] == "-r") or (sys.argv[1] == "-s") or (sys.argv[1] == '-d') or (sys.argv[1] == '-m')):
-    #check if this is a simulation or a debug mode
-    debug = False
-    simulation = False
-    if sys.argv[1] == "-d":
-        debug = True
-    elif sys.argv[1] == "-s":
-        simulation = True
-
-    # It creates an object of the class `robot` and assigns it to the variable `khepera`.
-    khepera = define_khepera(simulation)
-
-    #info to store data
-    if sys.argv[1] == "-r":
-        filename = "louis/res/"+sys.argv[6] + ".csv"  if len(sys.argv) > 6 else "louis/res/data.csv"
-    else:
-        filename =  sys.argv[6] + ".csv"  if len(sys.argv) > 6 else "data_analysis/data.csv"
+def main(
+        args,               #type: list
+        variant = VARIANT   #type: str
+    ):
+    """
+    It runs the model with the options of the command line.
 
-    #manual control
-    if sys.argv[1] == "-m":
-        user_input = 'e'
-        while(khepera.is_alive()):
-            try:
-                print("z,q,s,d to controll - a to stop : ")
-                user_input = raw_input()
-                if user_input == 'a':
+    @param args The command line arguments, args[0] being the name of the script.
+    @param variant The variant of the model, a key of VARIANTS
+    @return The exit status
+    """
+    if len(args) < 2 or not args[1] or args[1] == "-h":
+        print("usage : model.py -[option] [lower_bound_food] [upper_bound_food] [lower_bound_shade] [upper_bound_shade] [name_of_file (without extension)]")
+        print("options :")
+        print("\t-r: run")
+        print("\t-d: debug")
+        print("\t-s: simulation")
+        print("\t-m : manual")
+        print("\t-h : help")
+        print("values :")
+        print("\tlower_bound_food : lower bound of the food stimulus - def 940")
+        print("\tupper_bound_food : upper bound of the food stimulus - def 955")
+        print("\tlower_bound_shade : lower bound of the shade stimulus - def 450")
+        print("\tupper_bound_shade : upper bound of the shade stimulus - def 550")
+        print("\tname_of_file : name of the file where the data will be saved - def data.csv")
+        print("example : ")
+        print('\tmodel.py -r 940 955 450 550 "expriment_1"')
+        return 0
+    elif ((args[1] == "-r") or (args[1] == "-s") or (args[1] == '-d') or (args[1] == '-m')):
+        #check if this is a simulation or a debug mode
+        debug = False
+        simulation = False
+        if args[1] == "-d":
+            debug = True
+        elif args[1] == "-s":
+            simulation = True
+
+        #trace (every step in debug mode)
+        trace = setup_trace(logging.DEBUG if debug else LOG_LEVEL)
+        #simulation and replay of a session or a capture as fast as possible
+        if (simulation and VIRTUAL_CLOCK) or (not simulation and TRANSPORT in ("replay", "capture") and REPLAY_SPEED == "max"):
+            set_clock(VirtualClock())
+
+        # It creates an object of the class `robot` and assigns it to the variable `khepera`.
+        food_bounds = (int(args[2]) if len(args) > 2 else 940, int(args[3]) if len(args) > 3 else 955)
+        shade_bounds = (int(args[4]) if len(args) > 4 else 400, int(args[5]) if len(args) > 5 else 555)
+        khepera = define_khepera(simulation, food_bounds, shade_bounds, variant = variant)
+
+        #info to store data
+        extension = runlog.EXTENSION if LOG_FORMAT == "rlog" else ".csv"
+        if args[1] == "-r":
+            filename = "louis/res/"+args[6] + extension  if len(args) > 6 else "louis/res/data" + extension
+        else:
+            filename =  args[6] + extension  if len(args) > 6 else "data_analysis/data" + extension
+
+        #manual control
+        if args[1] == "-m":
+            user_input = 'e'
+            while(khepera.is_alive()):
+                try:
+                    print("z,q,s,d to controll - a to stop : ")
+                    user_input = raw_input()
+                    if user_input == 'a':
+                        khepera.motors.emergency_stop()
+                        break
+                    elif user_input == 'e':
+                        khepera.motors.stop()
+                    elif user_input == 'z':
+                        khepera.motors.forward()
+                    elif user_input == 'q':
+                        khepera.motors.turn_right()
+                    elif user_input == 's':
+                        khepera.motors.backward()
+                    elif  user_input == 'd':
+                        khepera.motors.turn_left()
+                    else : 
+                        pass
+                    khepera.motors.update(False)
+                    time.sleep(TIME_SLEEP)
+                except KeyboardInterrupt:
                     khepera.motors.emergency_stop()
+                    print("Emergency stop")
                     break
-                elif user_input == 'e':
-                    khepera.motors.stop()
-                elif user_input == 'z':
-                    khepera.motors.forward()
-                elif user_input == 'q':
-                    khepera.motors.turn_right()
-                elif user_input == 's':
-                    khepera.motors.backward()
-                elif  user_input == 'd':
-                    khepera.motors.turn_left()
-                else : 
-                    pass
-                khepera.motors.update(False)
-                time.sleep(TIME_SLEEP)
-            except KeyboardInterrupt:
-                khepera.motors.emergency_stop()
-                print("Emergency stop")
-                break
-    #run, debug or simulation mode
-    elif sys.argv[1] == "-r" or sys.argv[1] == "-s" or sys.argv[1] == "-d":
-        #if not simulation wait 3s to unplug robot
-        if sys.argv[1] == "-r":
-            time.sleep(1)
-        #get start time
-        ts = float(time.time() * 1000)
-        iter = 0
-        #while robot is alive, loop
-        while(khepera.is_alive()):
-            #catch keyboard interruption
-            try:
-                #update
-                khepera.update(debug, simulation)
-                #compute time and iteration
-                time_since_start = float(time.time() * 1000) - ts
-                if iter == 0 :
-                    khepera.write_header_data(filename)
-                iter = khepera.save(filename, time_since_start, iter)
-                #display
-                display(khepera, iter, time_since_start)
-                #wait until next iteration
-                time.sleep(TIME_SLEEP)
-            except KeyboardInterrupt:
-                khepera.motors.emergency_stop(simulation)
-                print("Emergency stop")
-                break
-        #end of run
-        khepera.motors.emergency_stop(simulation)
-        print("robot is dead")
-        khepera.die(simulation)    
-else:
-    print("error : unknown option")
-    print("python3 model.py -h for help")
-    exit(0)
-# ----------------------------------------------------------------------------------------------------------------------
\ No newline at end of file
+        #run, debug or simulation mode
+        elif args[1] == "-r" or args[1] == "-s" or args[1] == "-d":
+            #if not simulation wait 3s to unplug robot
+            if args[1] == "-r":
+                time.sleep(1)
+            #capture the data read from the robot
+            if CAPTURE_FILE and not simulation:
+                khepera.start_capture(CAPTURE_FILE)
+            #timing of the stages of the steps, set before the acquisition thread uses it
+            if TIMING_TRACE:
+                khepera.set_tracer(tracing.Tracer(TIMING_TRACE_SIZE))
+            tracer = khepera.tracer
+            #read sensors in background
+            if ASYNC_ACQUISITION and not simulation:
+                khepera.start_acquisition()
+            #get start time
+            ts = clock.time() * 1000
+            iter = 0
+            scheduler = Scheduler(TIME_SLEEP)
+            scheduler.start()
+            khepera.set_scheduler(scheduler)
+            dashboard_display = Display(DISPLAY_LEVEL, DISPLAY_PERIOD)
+            #a capture replayed as fast as possible gives the durations of the captured steps
+            replayed = khepera.com if isinstance(khepera.com, transport.CaptureTransport) and REPLAY_SPEED == "max" else None
+            #while robot is alive, loop
+            while(khepera.is_alive()):
+                #catch keyboard interruption
+                try:
+                    tracer.start()
+                    #update
+                    dt = replayed.step_dt(scheduler.dt) if replayed is not None else scheduler.dt
+                    khepera.update(debug, simulation, dt)
+                    #compute time and iteration
+                    time_since_start = clock.time() * 1000 - ts
+                    if iter == 0 :
+                        khepera.write_header_data(filename)
+                    iter = khepera.save(filename, time_since_start, iter)
+                    tracer.mark("log")
+                    #display
+                    dashboard_display.update(khepera, iter, time_since_start)
+                    tracer.mark("display")
+                    tracer.end("step")
+                    #wait until next iteration
+                    scheduler.wait()
+                    tracer.mark("wait")
+                except KeyboardInterrupt:
+                    khepera.motors.emergency_stop(simulation)
+                    khepera.close_log()
+                    print("Emergency stop")
+                    break
+                except EOFError as error:
+                    #end of a replayed session
+                    print(error)
+                    break
+                except Exception:
+                    #keep the last steps to understand the crash
+                    log.exception("crash at iteration %d", iter)
+                    khepera.motors.emergency_stop(simulation)
+                    khepera.close_log()
+                    khepera.stop_capture()
+                    with open(TRACE_FILE, "w") as file:
+                        trace.dump(file)
+                    if tracer.enabled:
+                        tracer.export(os.path.splitext(filename)[0] + tracing.EXTENSION)
+                    raise
+            #end of run
+            khepera.close_log()
+            if tracer.enabled:
+                print("timing trace : " + str(tracer.export(os.path.splitext(filename)[0] + tracing.EXTENSION)) + " spans")
+            print("ticks : " + str(scheduler.ticks) + " | overruns : " + str(scheduler.overruns) + " | jitter mean : " + "{0:0.4f}".format(scheduler.mean_jitter()) + "s max : " + "{0:0.4f}".format(scheduler.max_jitter) + "s")
+            if khepera.acquisition is not None:
+                a = khepera.acquisition
+                print("sensor age : mean " + "{0:0.4f}".format(a.mean_staleness()) + "s max : " + "{0:0.4f}".format(a.max_staleness) + "s")
+            khepera.stop_acquisition()
+            khepera.motors.emergency_stop(simulation)
+            print("robot is dead")
+            khepera.die(simulation)
+            khepera.stop_capture()
+            if not simulation:
+                khepera.com.close()
+    else:
+        print("error : unknown option")
+        print("python3 model.py -h for help")
+        return 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
+# ----------------------------------------------------------------------------------------------------------------------
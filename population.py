@@ -0,0 +1,611 @@
+##
+# @file population.py
+#
+# @brief NumPy engine stepping a population of simulated robots in lockstep.
+#
+# @author  Louis L'Haridon
+#
+# @section description_population Description
+# The object graph of a robot built by model.define_khepera() (variables, sensors, stimuli,
+# motivations, behavioral systems, nociceptor and cortisol) is compiled once into arrays,
+# then the state of N robots (one row per robot) is updated at once with the same semantics
+# as Robot.update() on the virtual clock :
+# - each robot moves in its own copy of the arena of simulator.default_arena(), with its own predators
+# - sensors, stimuli, motivations and nociceptor are computed from the raw values of the arena
+# - the motivation with the highest intensity selects a behavioral system, whose first behavior able
+#   to behave sets the motors and applies its effects (consumatory animations included)
+# Dead robots are frozen : their variables do not change anymore and their motors are stopped.
+#
+# @section usage_population Usage
+# python population.py [n_robots] [max_steps] [seed] [output.csv] [variant]
+#
+# Copyright (c) 2022 Louis L'Haridon.  All rights reserved.
+
+# Modules
+import math
+import sys
+
+import numpy as np
+
+import model
+import simulator
+from sweep import METRICS
+
+
+def py_min(bound, x):
+    """
+    It returns min(bound, x) element-wise with the semantics of the builtin (nan gives bound).
+    """
+    return np.where(x < bound, x, bound)
+
+
+def py_max(bound, x):
+    """
+    It returns max(bound, x) element-wise with the semantics of the builtin (nan gives bound).
+    """
+    return np.where(x > bound, x, bound)
+
+
+def clip01(x):
+    """
+    It returns max(0.0, min(1.0, x)) element-wise with the semantics of the builtins.
+    """
+    return py_max(0.0, py_min(1.0, x))
+
+
+# The class `BatchArena` moves N simulated Khepera, each one in its own copy of an arena
+class BatchArena:
+    def __init__(
+            self,
+            n,              #type: int
+            arena,          #type: simulator.Arena
+            n_predators,    #type: int
+            rng             #type: np.random.RandomState
+        ):
+        """
+        @param arena The arena giving the walls and ground patches (its predators are ignored).
+        @param n_predators The number of predators of each robot.
+        """
+        self.n = n
+        self.width = arena.width
+        self.height = arena.height
+        self.floor = arena.floor
+        self.patches = [(p.x, p.y, p.radius, p.value) for p in arena.patches]
+        #robots, at the center of the arena like simulator.SimulatedKhepera
+        self.x = np.full(n, arena.width / 2.0)
+        self.y = np.full(n, arena.height / 2.0)
+        self.theta = np.zeros(n)
+        self.left = np.zeros(n)     # speed of the left wheels (m/s)
+        self.right = np.zeros(n)    # speed of the right wheels (m/s)
+        self.collisions = np.zeros(n, dtype=int)
+        #predators (n, n_predators)
+        shape = (n, n_predators)
+        self.p_x = rng.uniform(0.3, 1.7, shape)
+        self.p_y = rng.uniform(0.3, 1.7, shape)
+        self.p_r = np.full(shape, 0.08)
+        a = rng.uniform(0.0, 2.0 * math.pi, shape)
+        self.p_vx = 0.15 * np.cos(a)
+        self.p_vy = 0.15 * np.sin(a)
+        self.ir_angles = np.radians(simulator.IR_ANGLES)
+        self.us_angles = np.radians(simulator.US_ANGLES)
+        self.gnd = np.array(simulator.GND_POSITIONS)
+
+    def drive(self, left, right):
+        """
+        This function sets the wheel speeds, given in motor speed units as sent to the server.
+        """
+        self.left = left * simulator.SPEED_TO_MS
+        self.right = right * simulator.SPEED_TO_MS
+
+    def step(
+            self,
+            dt  #type: float
+        ):
+        """
+        This function moves the predators and the robots during dt seconds.
+        """
+        #predators bouncing on the walls
+        self.p_x += self.p_vx * dt
+        self.p_y += self.p_vy * dt
+        out = (self.p_x < self.p_r) | (self.p_x > self.width - self.p_r)
+        self.p_vx = np.where(out, -self.p_vx, self.p_vx)
+        self.p_x = np.clip(self.p_x, self.p_r, self.width - self.p_r)
+        out = (self.p_y < self.p_r) | (self.p_y > self.height - self.p_r)
+        self.p_vy = np.where(out, -self.p_vy, self.p_vy)
+        self.p_y = np.clip(self.p_y, self.p_r, self.height - self.p_r)
+        #differential drive, exact integration of an arc
+        v = (self.left + self.right) / 2.0
+        w = (self.right - self.left) / simulator.WHEEL_BASE
+        straight = np.abs(w) < 1e-9
+        safe_w = np.where(straight, 1.0, w)
+        r = v / safe_w
+        theta = self.theta + w * dt
+        self.x += np.where(straight, v * np.cos(self.theta) * dt, r * (np.sin(theta) - np.sin(self.theta)))
+        self.y -= np.where(straight, -v * np.sin(self.theta) * dt, r * (np.cos(theta) - np.cos(self.theta)))
+        self.theta = theta % (2.0 * math.pi)
+        self.collide()
+
+    def collide(self):
+        """
+        This function keeps the robots inside the walls and out of their predators.
+        """
+        radius = simulator.ROBOT_RADIUS
+        hit = (self.x < radius) | (self.x > self.width - radius) | (self.y < radius) | (self.y > self.height - radius)
+        self.x = np.clip(self.x, radius, self.width - radius)
+        self.y = np.clip(self.y, radius, self.height - radius)
+        for k in range(self.p_x.shape[1]):
+            dx = self.x - self.p_x[:, k]
+            dy = self.y - self.p_y[:, k]
+            d = np.sqrt(dx * dx + dy * dy)
+            contact = d < radius + self.p_r[:, k]
+            centered = d < 1e-9
+            dx = np.where(centered, 1.0, dx)
+            dy = np.where(centered, 0.0, dy)
+            d = np.where(centered, 1.0, d)
+            push = np.where(contact, radius + self.p_r[:, k] - d, 0.0)
+            self.x += dx / d * push
+            self.y += dy / d * push
+            hit |= contact
+        self.collisions += hit
+
+    def ray(
+            self,
+            x,          #type: np.ndarray
+            y,          #type: np.ndarray
+            angle,      #type: np.ndarray
+            max_range   #type: float
+        ):
+        """
+        This function casts the rays (n, rays) from (x, y) in direction angle against walls and predators.
+
+        @return The distances of the first hits, max_range if nothing is hit before.
+        """
+        dx = np.cos(angle)
+        dy = np.sin(angle)
+        d = np.full(x.shape, float(max_range))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            d = np.where(dx > 1e-9, np.minimum(d, (self.width - x) / dx), d)
+            d = np.where(dx < -1e-9, np.minimum(d, -x / dx), d)
+            d = np.where(dy > 1e-9, np.minimum(d, (self.height - y) / dy), d)
+            d = np.where(dy < -1e-9, np.minimum(d, -y / dy), d)
+        for k in range(self.p_x.shape[1]):
+            ox = self.p_x[:, k, None] - x
+            oy = self.p_y[:, k, None] - y
+            proj = ox * dx + oy * dy
+            dist2 = ox * ox + oy * oy - proj * proj
+            r2 = (self.p_r[:, k, None])**2
+            hit = (proj > 0.0) & (dist2 <= r2)
+            along = np.maximum(0.0, proj - np.sqrt(np.maximum(r2 - dist2, 0.0)))
+            d = np.where(hit, np.minimum(d, along), d)
+        return np.maximum(0.0, d)
+
+    def cast(
+            self,
+            angles,     #type: np.ndarray
+            max_range   #type: float
+        ):
+        """
+        This function casts one ray per sensor from the border of the robots.
+        """
+        angle = self.theta[:, None] + angles[None, :]
+        x = self.x[:, None] + simulator.ROBOT_RADIUS * np.cos(angle)
+        y = self.y[:, None] + simulator.ROBOT_RADIUS * np.sin(angle)
+        return self.ray(x, y, angle, max_range)
+
+    def sense(self):
+        """
+        This function returns the raw values of the sensors of all robots.
+
+        @return A dict of the raw values (n, size) of each channel, as in the replies of the server:
+                'g' ultrasonic, 'n' proximity and ground.
+        """
+        d = self.cast(self.ir_angles, simulator.IR_RANGE)
+        prox = np.floor(simulator.IR_MAX * (1.0 - d / simulator.IR_RANGE)**2)
+        d = self.cast(self.us_angles, simulator.US_MAX)
+        us = np.where(d >= simulator.US_MAX, simulator.US_NO_ECHO, np.floor(100 * np.maximum(d, simulator.US_MIN)))
+        c = np.cos(self.theta)[:, None]
+        s = np.sin(self.theta)[:, None]
+        fwd = self.gnd[None, :, 0]
+        lat = self.gnd[None, :, 1]
+        gx = self.x[:, None] + fwd * c - lat * s
+        gy = self.y[:, None] + fwd * s + lat * c
+        gnd = np.full(gx.shape, float(self.floor))
+        for px, py, pr, value in self.patches:
+            gnd = np.where((gx - px)**2 + (gy - py)**2 <= pr**2, value, gnd)
+        return {'g': us, 'n': np.concatenate([prox, gnd], axis=1)}
+
+
+# The class `Population` holds the state of N robots in arrays and updates them like Robot.update()
+class Population:
+    def __init__(
+            self,
+            n,                  #type: int
+            template,           #type: model.Robot
+            arena = None,       #type: simulator.Arena
+            n_predators = 2,    #type: int
+            seed = None         #type: int
+        ):
+        """
+        @param n The number of robots.
+        @param template The robot compiled into arrays (see define_population()), its state is not modified.
+        @param arena The arena copied for each robot, none to keep the robots still and feed the raw
+                     sensor values to update().
+        """
+        self.n = n
+        self.rng = np.random.RandomState(seed)
+        self.dt = model.TIME_SLEEP
+        self.time = 0.0
+        self.compile(template)
+        self.world = BatchArena(n, arena, n_predators, self.rng) if arena is not None else None
+        #state
+        self.values = np.tile(self.var_value, (n, 1))
+        self.errors = np.zeros((n, len(self.var_value)))
+        self.norm = [np.zeros((n, end - start)) for key, start, end, mn, mx, inv in self.sensors]
+        self.stimuli = [np.zeros((n, self.norm[s].shape[1])) for s, mn, mx, inv in self.stim]
+        self.intensity = np.zeros((n, len(self.mots)))
+        size = self.norm[self.noc_sensor].shape[1]
+        self.noc_data = np.zeros((n, size))
+        self.noc_speed = np.zeros((n, size))
+        self.noc_circular = np.zeros((n, size))
+        self.noc_val = np.zeros((n, size))
+        self.concentration = np.zeros(n)
+        self.release_rate = np.zeros(n)
+        self.wellbeing = np.zeros(n)
+        self.pain = np.zeros(n)
+        self.left = np.zeros(n)
+        self.right = np.zeros(n)
+        self.selected = np.zeros(n, dtype=int)     # index of the selected motivation
+        self.animation_start = np.full((n, len(self.animations)), np.nan)
+        self.alive = np.ones(n, dtype=bool)
+        self.steps = np.zeros(n, dtype=int)
+        #nociceptor neighbours and irradiation kernel, as in model.VectorNociceptor
+        self.r_idx, self.l_idx, self.l_mask, self.kernel = model.nociceptor_arrays(size)
+
+    def compile(
+            self,
+            robot   #type: model.Robot
+        ):
+        """
+        This function turns the object graph of a robot into index and parameter arrays.
+        """
+        variables = robot.variables
+        var_index = dict((id(v), i) for i, v in enumerate(variables))
+        self.var_names = [v.name for v in variables]
+        self.var_value = np.array([v.value for v in variables], dtype=float)
+        self.var_ideal = np.array([v.ideal for v in variables], dtype=float)
+        self.var_margin = np.array([v.margin for v in variables], dtype=float)
+        self.var_decrease = np.array([bool(v.decrease) for v in variables])
+        #sensors : (channel, start, end, min, max, inv)
+        sensor_index = dict((id(s), i) for i, s in enumerate(robot.sensors))
+        self.sensor_names = [s.name for s in robot.sensors]
+        self.sensors = [(s.r_char, s.start, s.end, s.min, s.max, s.inv) for s in robot.sensors]
+        #stimuli : (sensor, min_val, max_val, inv)
+        stim_index = dict((id(s), i) for i, s in enumerate(robot.stimuli))
+        self.stim_names = [s.name for s in robot.stimuli]
+        self.stim = [(sensor_index[id(s.sensor)], s.min_val, s.max_val, s.inv) for s in robot.stimuli]
+        #behavioral systems : list of behaviors (kind, stimulus, treshold, effects, animation)
+        #effects are (variable, decrease, step), the main effect first
+        self.animations = []    #type : list[list[tuple(float, float, float)]]
+        self.systems = []
+        for b_s in robot.behavior_systems:
+            behaviors = []
+            for b in b_s.get_behaviors():
+                effects = []
+                if b.main_effect is not None:
+                    effects.append(b.main_effect)
+                effects += b.secondary_effects
+                effects = [(var_index[id(e.var)], bool(e.decrease), e.step) for e in effects]
+                animation = None
+                if isinstance(b, model.Consumatory):
+                    kind = "consumatory"
+                    animation = len(self.animations)
+                    self.animations.append(self.motor_steps(robot, b.animation))
+                elif isinstance(b, model.Reactive):
+                    kind = "reactive"
+                else:
+                    kind = "appettitive"
+                behaviors.append((kind, stim_index[id(b.associated_stimulus)], b.treshold, effects, animation))
+            self.systems.append((b_s.get_drive(), behaviors))
+        #motivations : (variable, stimulus, attention grabber, reactive, behavioral system)
+        self.mot_names = [m.name for m in robot.motivations]
+        self.mots = []
+        for m in robot.motivations:
+            system = -1
+            for i, (drive, behaviors) in enumerate(self.systems):
+                if drive == m.get_drive():
+                    system = i
+                    break
+            self.mots.append((var_index[id(m.controlled_var)], stim_index[id(m.stimulus)],
+                              m.signal_grabber, isinstance(m, model.ReactiveMot), system))
+        #nociceptor and cortisol, variant of the model
+        self.noc_sensor = sensor_index[id(robot.nociceptor.sensor)]
+        self.circular_scaling = robot.nociceptor.circular_scaling
+        self.cortisol = robot.cortisol
+        self.pain_formula = robot.pain_formula
+        self.alpha = robot.cortisol_hormone.alpha
+        self.decay_rate = robot.cortisol_hormone.decay_rate
+
+    def motor_steps(
+            self,
+            robot,      #type: model.Robot
+            animation   #type: model.MotorSequence
+        ):
+        """
+        This function returns the (end time, left, right) of each step of a consumatory animation,
+        the motor values being read by playing its actions on a copy of the motors.
+        """
+        steps = []
+        end = 0.0
+        motors = robot.motors
+        saved = (motors.left, motors.right)
+        for action, d in animation.steps:
+            action()
+            end += d
+            steps.append((end, motors.left, motors.right))
+        motors.left, motors.right = saved
+        return steps
+
+    def set_hormone(
+            self,
+            alpha,      #type: float
+            decay_rate  #type: float
+        ):
+        """
+        This function sets the release and decay rates of the cortisol of all robots.
+        """
+        self.alpha = alpha
+        self.decay_rate = decay_rate
+
+    def impact(
+            self,
+            mask,       #type: np.ndarray
+            effects     #type: list
+        ):
+        """
+        This function applies effects, in order, to the robots of mask (as Effect.impact()).
+        """
+        mask = mask & self.alive
+        for v, decrease, step in effects:
+            value = self.values[:, v]
+            if decrease:
+                new = np.where(value - step > 0.0, value - step, 0.0)
+            else:
+                new = np.where(value + step < 1.0, value + step, 1.0)
+            self.values[:, v] = np.where(mask, new, value)
+
+    def update(
+            self,
+            raw,            #type: dict
+            dt = None       #type: float
+        ):
+        """
+        This function updates all robots from the raw values of their sensors, as Robot.update().
+
+        @param raw The raw values (n, size) of each channel.
+        @param dt The duration (s) of the previous step, TIME_SLEEP if None.
+        """
+        dt = self.dt if dt is None else dt
+        n = self.n
+        #sensors
+        for i, (key, start, end, mn, mx, inv) in enumerate(self.sensors):
+            data = (np.asarray(raw[key], dtype=float)[:, start:end] - mn) / (mx - mn)
+            self.norm[i] = 1.0 - data if inv else data
+        #variables errors
+        low = self.var_ideal - self.var_margin
+        high = self.var_ideal + self.var_margin
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.errors = np.where(self.values < low, np.abs(low - self.values) / low,
+                                   np.where(self.values > high, np.abs((self.values - high) / (1.0 - self.var_ideal + self.var_margin)), 0.0))
+        #stimuli
+        for i, (s, mn, mx, inv) in enumerate(self.stim):
+            data = (self.norm[s] - mn) / (mx - mn)
+            if inv:
+                data = 1.0 - data
+            self.stimuli[i] = np.where((data > 1.0) | (data < 0.0), 0.0, data)
+        #motivations (the reactive ones use the nociceptor of the previous step)
+        for k, (v, s, grabber, reactive, system) in enumerate(self.mots):
+            if grabber == -1:
+                stim = self.stimuli[s].mean(axis=1)
+            else:
+                stim = -np.sort(-self.stimuli[s], axis=1)[:, :grabber].mean(axis=1)
+            if reactive:
+                intensity = self.noc_val.mean(axis=1) + stim
+                self.intensity[:, k] = np.where(intensity >= 1.0, 1.0, intensity)
+            elif grabber == -1:
+                self.intensity[:, k] = self.errors[:, v] * (1 + stim)
+            else:
+                self.intensity[:, k] = stim
+        #nociceptor
+        prev = self.noc_data
+        self.noc_data = self.norm[self.noc_sensor]
+        self.noc_speed = (np.abs(self.noc_data - prev) / dt + self.noc_speed) / 2
+        r_dist = np.abs(self.noc_data - self.noc_data[:, self.r_idx])
+        l_dist = np.abs(self.noc_data - self.noc_data[:, self.l_idx]) * self.l_mask
+        with np.errstate(over="ignore", invalid="ignore"):
+            self.noc_circular = ((r_dist + l_dist)/2 + self.noc_circular) / 2.0
+            if self.circular_scaling:
+                self.noc_circular *= ((math.pi/6.0)*5.5)/dt
+            self.noc_val = ((self.noc_speed + self.noc_circular)/2.0).dot(self.kernel.T)
+            noc_mean = self.noc_val.mean(axis=1)
+            #cortisol
+            if self.cortisol:
+                self.release_rate = self.alpha * noc_mean
+                self.concentration = clip01(self.concentration + (self.release_rate - self.decay_rate) * dt / model.TIME_SLEEP)
+            #internal state and pain
+            self.wellbeing = 1.0 - self.errors.sum(axis=1) / self.errors.shape[1]
+            if self.pain_formula == "constant":
+                self.pain = clip01(noc_mean * (1.02))
+            else:
+                self.pain = clip01(noc_mean * (1 + 0.2*(1.0-self.wellbeing) + self.concentration))
+        #winner takes all, the first motivation wins ties
+        best = self.intensity[:, 0].copy()
+        self.selected = np.zeros(n, dtype=int)
+        for k in range(1, len(self.mots)):
+            better = self.intensity[:, k] > best
+            best = np.where(better, self.intensity[:, k], best)
+            self.selected = np.where(better, k, self.selected)
+        #behaviors
+        now = self.time
+        for k, (v, s, grabber, reactive, system) in enumerate(self.mots):
+            if system < 0:
+                continue
+            todo = self.selected == k
+            for kind, s, treshold, effects, animation in self.systems[system][1]:
+                if not todo.any():
+                    break
+                stim = self.stimuli[s]
+                half = stim.shape[1] // 2
+                first = stim[:, :half].sum(axis=1) / half
+                second = stim[:, half:2*half].sum(axis=1) / half
+                if kind == "consumatory":
+                    mask = todo & (stim.mean(axis=1) > treshold)
+                    start = self.animation_start[:, animation]
+                    running = now - start < self.animation_duration(animation)
+                    begin = mask & ~running
+                    self.impact(begin, effects)
+                    start = np.where(begin, now, start)
+                    self.animation_start[:, animation] = start
+                    elapsed = now - start
+                    left = np.zeros(n)
+                    right = np.zeros(n)
+                    done = np.zeros(n, dtype=bool)
+                    for end, l, r in self.animations[animation]:
+                        step = ~done & (elapsed < end)
+                        left = np.where(step, l, left)
+                        right = np.where(step, r, right)
+                        done |= step
+                    self.left = np.where(mask, left, self.left)
+                    self.right = np.where(mask, right, self.right)
+                elif kind == "appettitive":
+                    mask = todo
+                    wander = self.rng.random_sample((n, 2))
+                    seek = stim.mean(axis=1) > 0.1
+                    left = np.where(seek, second * 2, 0.5 + ((0.5 - wander[:, 0])/5))
+                    right = np.where(seek, first * 2, 0.5 + ((0.5 - wander[:, 1])/5))
+                    self.left = np.where(mask, left, self.left)
+                    self.right = np.where(mask, right, self.right)
+                    self.impact(mask, effects)
+                else:
+                    mask = todo
+                    self.left = np.where(mask, first * 2, self.left)
+                    self.right = np.where(mask, - second * 2, self.right)
+                    self.impact(mask, effects)
+                todo = todo & ~mask
+        #effect on system
+        for i in range(len(self.stimuli)):
+            self.stimuli[i] = clip01(self.stimuli[i] + self.stimuli[i] * self.concentration[:, None])
+        #dead robots stop
+        self.steps += self.alive
+        self.alive &= self.is_alive()
+        self.left = np.where(self.alive, self.left, 0.0)
+        self.right = np.where(self.alive, self.right, 0.0)
+        self.time += dt
+
+    def animation_duration(self, animation):
+        return self.animations[animation][-1][0]
+
+    def is_alive(self):
+        """
+        This function returns which robots are alive, as Robot.is_alive().
+        """
+        dead = np.where(self.var_decrease, self.values <= 0.0, self.values >= 1.0)
+        return ~dead.any(axis=1)
+
+    def speed(self):
+        """
+        This function returns the motor speed of the robots, as set by Robot.update().
+        """
+        return np.floor(model.SPEED_ROBOT + (self.pain * 400))
+
+    def step(self):
+        """
+        This function moves the robots with the motor speeds of the previous step, reads their
+        sensors, updates them and sends the new motor speeds to the arena.
+        """
+        self.world.step(self.dt)
+        self.update(self.world.sense(), self.dt)
+        speed = self.speed()
+        self.world.drive(np.where(self.left != 0.0, self.left * speed, 0.0),
+                         np.where(self.right != 0.0, self.right * speed, 0.0))
+
+    def run(
+            self,
+            max_steps   #type: int
+        ):
+        """
+        This function steps the robots until they are all dead or max_steps steps.
+
+        @return A dict of the summary metrics (one value per robot) of the run.
+        """
+        sums = np.zeros((self.n, 4))
+        max_pain = np.zeros(self.n)
+        energy = self.var_names.index("energy")
+        temperature = self.var_names.index("temperature")
+        for i in range(max_steps):
+            if not self.alive.any():
+                break
+            alive = self.alive.copy()
+            self.step()
+            #same order as sweep.run() : the step where a robot dies is counted
+            sums += alive[:, None] * np.stack([self.values[:, energy], self.values[:, temperature],
+                                               self.pain, self.concentration], axis=1)
+            max_pain = np.where(alive, np.maximum(max_pain, self.pain), max_pain)
+        n = np.maximum(self.steps, 1)
+        return {
+            "steps": self.steps,
+            "alive": self.alive.astype(int),
+            "duration": self.steps * self.dt,
+            "energy": self.values[:, energy],
+            "temperature": self.values[:, temperature],
+            "integrity": self.values[:, self.var_names.index("integrity")],
+            "mean_energy": sums[:, 0] / n,
+            "mean_temperature": sums[:, 1] / n,
+            "mean_pain": sums[:, 2] / n,
+            "max_pain": max_pain,
+            "mean_cortisol": sums[:, 3] / n,
+            "collisions": self.world.collisions,
+        }
+
+
+def define_population(
+        n,                      #type: int
+        food_bounds = (940, 955),   #type: tuple
+        shade_bounds = (400, 555),  #type: tuple
+        n_predators = 2,        #type: int
+        seed = None,            #type: int
+        variant = model.VARIANT #type: str
+    ):
+    #type: (...) -> Population
+    """
+    It builds a population of n robots defined by model.define_khepera(), in the arena of simulation mode.
+
+    @param variant The variant of the model, a key of model.VARIANTS
+    """
+    template = model.define_khepera(True, food_bounds, shade_bounds, variant = variant)
+    #the predators of each robot are made by the BatchArena
+    arena = simulator.default_arena((food_bounds[0] + food_bounds[1]) // 2, (shade_bounds[0] + shade_bounds[1]) // 2, n_predators = 0)
+    return Population(n, template, arena, n_predators, seed)
+
+
+def main(args):
+    if len(args) > 1 and args[1] == "-h":
+        print("usage : population.py [n_robots] [max_steps] [seed] [output.csv] [variant]")
+        return 1
+    n = int(args[1]) if len(args) > 1 else 100
+    max_steps = int(args[2]) if len(args) > 2 else 36000
+    seed = int(args[3]) if len(args) > 3 else 0
+    filename = args[4] if len(args) > 4 else "data_analysis/population.csv"
+    variant = args[5] if len(args) > 5 else model.VARIANT
+    population = define_population(n, seed = seed, variant = variant)
+    metrics = population.run(max_steps)
+    with open(filename, "w") as file:
+        file.write(",".join(["robot"] + METRICS) + "\n")
+        for i in range(n):
+            file.write(",".join([str(i)] + ["%.6g" % metrics[m][i] for m in METRICS]) + "\n")
+    print(filename)
+    print("alive : " + str(int(metrics["alive"].sum())) + "/" + str(n) + " | mean steps : " + "{0:0.1f}".format(metrics["steps"].mean()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,267 @@
+##
+# @file runlog.py
+#
+# @brief Compact binary format for the run logs of the model.
+#
+# @author  Louis L'Haridon
+#
+# @section description_runlog Description
+# A run log (.rlog) stores the same columns as the csv written by model.py,
+# each row being a fixed size record of little endian float32 values.
+#
+# file layout :
+# - magic "RLOG" and version (uint8)
+# - number of columns (uint16)
+# - for each column : length of the name (uint8) and name (ascii)
+# - records : one float32 per column
+#
+# @section usage_runlog Usage
+# python runlog.py to-csv run.rlog [run.csv]
+# python runlog.py to-rlog run.csv [run.rlog]
+#
+# Copyright (c) 2022 Louis L'Haridon.  All rights reserved.
+
+# Modules
+import os
+import struct
+import sys
+import time
+
+MAGIC = b"RLOG"
+VERSION = 1
+EXTENSION = ".rlog"
+
+HEADER = struct.Struct("<4sBH")
+
+
+def record_struct(
+        ncols   #type: int
+    ):
+    """
+    It returns the struct of one record of ncols columns.
+    """
+    return struct.Struct("<" + str(ncols) + "f")
+
+
+def read_header(
+        file    #type: file
+    ):
+    """
+    It reads the header of a run log.
+
+    @param file The run log opened in binary mode, at its beginning.
+
+    @return The list of the column names.
+    """
+    magic, version, ncols = HEADER.unpack(file.read(HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a run log (version " + str(VERSION) + ")")
+    columns = []
+    for i in range(ncols):
+        n = bytearray(file.read(1))[0]
+        columns.append(file.read(n).decode("ascii"))
+    return columns
+
+
+def encode_header(
+        columns #type: list
+    ):
+    """
+    It returns the header of a run log with the given columns.
+    """
+    data = HEADER.pack(MAGIC, VERSION, len(columns))
+    for c in columns:
+        name = c.encode("ascii")
+        data += struct.pack("<B", len(name)) + name
+    return data
+
+
+# The class `RunLogWriter` writes a run log, with the same interface as `model.DataLogger`
+class RunLogWriter:
+    def __init__(
+            self,
+            filename,           #type: str
+            max_rows = 20,      #type: int
+            max_delay = 1.0,    #type: float
+            append = False      #type: bool
+        ):
+        """
+        Records are packed when written and kept in memory until max_rows records are
+        waiting or the oldest one waits for more than max_delay seconds.
+        When appending to an existing run log its columns are read from its header.
+        """
+        self.filename = filename
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.columns = None
+        self.record = None
+        self.buffer = bytearray()
+        self.rows = 0
+        self.first_row_time = 0.0
+        if append and os.path.exists(filename) and os.path.getsize(filename) > 0:
+            self.file = open(filename, "r+b")
+            self.set_columns(read_header(self.file))
+            #drop an incomplete last record
+            start = self.file.tell()
+            size = os.path.getsize(filename) - start
+            self.file.seek(start + size - size % self.record.size)
+            self.file.truncate()
+        else:
+            self.file = open(filename, "wb")
+
+    def set_columns(
+            self,
+            columns #type: list
+        ):
+        self.columns = list(columns)
+        self.record = record_struct(len(self.columns))
+
+    def write_header(
+            self,
+            columns #type: list
+        ):
+        """
+        This function writes the header, it must be called before any row.
+
+        @param columns The names of the columns.
+        """
+        self.set_columns(columns)
+        self.file.write(encode_header(self.columns))
+
+    def write(
+            self,
+            values  #type: list
+        ):
+        """
+        This function packs a row and writes the buffered rows if needed.
+        A file without header gets columns named c0, c1, ...
+
+        @param values The values of the row.
+        """
+        if self.record is None:
+            self.write_header(["c" + str(i) for i in range(len(values))])
+        if not self.rows:
+            self.first_row_time = time.time()
+        self.buffer += self.record.pack(*values)
+        self.rows += 1
+        if self.rows >= self.max_rows or time.time() - self.first_row_time >= self.max_delay:
+            self.flush()
+
+    def flush(self):
+        """
+        This function writes the buffered records in the file.
+        """
+        if self.rows:
+            self.file.write(self.buffer)
+            del self.buffer[:]
+            self.rows = 0
+        self.file.flush()
+
+    def close(self):
+        """
+        This function writes the buffered records, syncs the file on disk and closes it.
+        """
+        self.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+
+
+def read(
+        filename    #type: str
+    ):
+    """
+    It reads a run log.
+
+    @param filename The name of the run log.
+
+    @return The list of the column names and the list of the rows (tuples of floats).
+    """
+    with open(filename, "rb") as file:
+        columns = read_header(file)
+        data = file.read()
+    record = record_struct(len(columns))
+    n = len(data) // record.size
+    rows = [record.unpack_from(data, i * record.size) for i in range(n)]
+    return columns, rows
+
+
+def load_dataframe(
+        filename    #type: str
+    ):
+    """
+    It loads a run log or a csv log in a pandas DataFrame.
+    If filename has no extension, the .rlog file is used if it exists, the .csv file otherwise.
+
+    @param filename The name of the log.
+
+    @return The DataFrame of the log.
+    """
+    import numpy as np
+    import pandas as pd
+    if not os.path.splitext(filename)[1]:
+        if os.path.exists(filename + EXTENSION):
+            filename = filename + EXTENSION
+        else:
+            filename = filename + ".csv"
+    if not filename.endswith(EXTENSION):
+        return pd.read_csv(filename, delimiter=",")
+    with open(filename, "rb") as file:
+        columns = read_header(file)
+        data = np.fromfile(file, dtype="<f4")
+    data = data[:len(data) - len(data) % len(columns)].reshape(-1, len(columns))
+    df = pd.DataFrame(data.astype(np.float64), columns=columns)
+    for c in ("iter", "time"):
+        if c in df.columns:
+            df[c] = df[c].astype(np.int64)
+    return df
+
+
+def rlog_to_csv(
+        src,    #type: str
+        dst     #type: str
+    ):
+    """
+    It converts a run log to the csv format written by model.py.
+    """
+    columns, rows = read(src)
+    with open(dst, "w") as file:
+        file.write(",".join(columns) + "\n")
+        for row in rows:
+            file.write(",".join(["%.9g" % v for v in row]) + "\n")
+
+
+def csv_to_rlog(
+        src,    #type: str
+        dst     #type: str
+    ):
+    """
+    It converts a csv log written by model.py to a run log.
+    """
+    writer = RunLogWriter(dst, max_rows = 1000)
+    with open(src, "r") as file:
+        writer.write_header(file.readline().strip().split(","))
+        for line in file:
+            line = line.strip()
+            if line:
+                writer.write([float(v) for v in line.split(",")])
+    writer.close()
+
+
+def main(args):
+    if len(args) < 3 or args[1] not in ("to-csv", "to-rlog"):
+        print("usage : runlog.py to-csv run.rlog [run.csv]")
+        print("        runlog.py to-rlog run.csv [run.rlog]")
+        return 1
+    src = args[2]
+    if args[1] == "to-csv":
+        dst = args[3] if len(args) > 3 else os.path.splitext(src)[0] + ".csv"
+        rlog_to_csv(src, dst)
+    else:
+        dst = args[3] if len(args) > 3 else os.path.splitext(src)[0] + EXTENSION
+        csv_to_rlog(src, dst)
+    print(dst)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -599,6 +599,53 @@ int GetUS( int argc, string * argv)
 }
 
 
+/*--------------------------------------------------------------------*/
+/*! ReadSensorFrame retrieves all the sensors used by the model in one reply
+ *  instead of one command per sensor.
+ *  reply : "q,us0,...,us4,ir0,...,ir11"
+ *
+ *	\param argc number of argument 	
+ *  \param argv array of argument
+ *
+ *  \return A value :
+ *      - 0 if success
+ *      - <0 if any error
+ *  
+ */
+int ReadSensorFrame( int argc, string * argv)
+{
+  char Buffer[MAXBUFFERSIZE],buf[MAXBUFFERSIZE];
+  int i;
+
+	if(kh4_measure_us((char *)Buffer,  dsPic)>=0)
+	{
+		sprintf(buf,"q");
+
+		for (i=0;i<5;i++) {
+			sprintf(buf+strlen(buf),",%d",Buffer[i*2] | Buffer[i*2+1]<<8);
+		}
+
+		if(kh4_proximity_ir((char *)Buffer, dsPic)>=0)
+		{
+			for (i=0;i<12;i++) {
+				sprintf(buf+strlen(buf),",%d",Buffer[i*2] | Buffer[i*2+1]<<8);
+			}
+
+			sprintf(Buffer,"%s\r\n",buf);
+			com_send(Buffer, strlen(Buffer));
+
+			#ifdef DEBUG
+				printf("\nReadSensorFrame : %s\n",buf);
+			#endif
+			return 0;
+		}
+	}
+	sprintf(Buffer,"%c\r\n",ERROR_CMD_CHAR);
+	com_send(Buffer, strlen(Buffer));
+	return -2;
+}
+
+
 /*--------------------------------------------------------------------*/
 /*! SetSpeed set the motor controller speed in the engine control unit.
  *
@@ -1265,7 +1312,16 @@ int getArgs(char *buf,string *larg)
 
 
 /*--------------------------------------------------------------------*/
-/*!  BinaryRead for GUI
+/*!  BinaryRead sends all the sensors in one packed binary frame
+ *
+ *   frame : 'x' | length | payload (length bytes) | checksum
+ *   payload (little endian) :
+ *      - us        5 x uint16   (0-9)
+ *      - proximity 12 x uint16  (10-33)
+ *      - ambient   12 x uint16  (34-57)
+ *      - speed     2 x int32    (58-65)
+ *      - position  2 x int32    (66-73)
+ *   checksum : sum of the payload bytes modulo 256
  *
  *	\param narg number of argument	
  *  \param larg array of argument
@@ -1274,69 +1330,63 @@ int getArgs(char *buf,string *larg)
  *      - 0 if success
  *      - <0 if any error
 */
+#define BINARY_PAYLOAD 74
+
+static void put_int32(char *p, int v)
+{
+	p[0]=(u_int8_t )(v & 0x00FF);
+	p[1]=(u_int8_t )((v>>8) & 0x00FF);
+	p[2]=(u_int8_t )((v>>16) & 0x00FF);
+	p[3]=(u_int8_t )((v>>24) & 0x00FF);
+}
+
 int	BinaryRead(int narg,string *larg) {
 	char Buffer[MAXBUFFERSIZE],buf[MAXBUFFERSIZE];
-	int i, data,vsl,vsr;
-		
-		// Write the proximity sensor value in the buffer
+	char *payload = Buffer+2;
+	int i,vsl,vsr;
+	unsigned char checksum=0;
 
-		Buffer[0]='x';     // 0
-		
+		if(kh4_measure_us((char *)buf, dsPic)<0)
+		{
+			sprintf(Buffer,"%c\r\n",ERROR_CMD_CHAR);
+			com_send(Buffer, strlen(Buffer));
+			return -1;
+		}
+
+		Buffer[0]='x';
+		Buffer[1]=BINARY_PAYLOAD;
+
+		// Write the ultrasonic sensor values in the buffer
+		memcpy(payload, buf, 10);
+
+		// Write the proximity sensor values
 		kh4_proximity_ir((char *)buf, dsPic);
-		for (i=0;i<24;i++)  // 1-24
-		{	
-				Buffer[i+1]=buf[i+1];
-		}	
-		
+		memcpy(payload+10, buf, 24);
+
 		// Write the ambient light measurement 
-	
 		kh4_ambiant_ir((char *)buf, dsPic);
-		for (i=0;i<24;i++)  // 25-48
-		{
-			Buffer[i+25]=buf[i+1];
-		}		
-		
-				
-		// Get the motor Speed and write it in the buffer
-		kh4_get_speed(&vsl,&vsr,dsPic );  // 49-56
-		
-    Buffer[49]=(u_int8_t )(vsl & 0x00FF);
-    Buffer[50]=(u_int8_t )((vsl>>8) & 0x00FF);
-    Buffer[51]=(u_int8_t )((vsl>>16) & 0x00FF);
-    Buffer[52]=(u_int8_t )((vsl>>24) & 0x00FF);
-    
+		memcpy(payload+34, buf, 24);
 
-    Buffer[53]=(u_int8_t )(vsr & 0x00FF);
-    Buffer[54]=(u_int8_t )((vsr>>8) & 0x00FF);
-    Buffer[55]=(u_int8_t )((vsr>>16) & 0x00FF);
-    Buffer[56]=(u_int8_t )((vsr>>24) & 0x00FF);
+		// Get the motor Speed and write it in the buffer
+		kh4_get_speed(&vsl,&vsr,dsPic );
+		put_int32(payload+58, vsl);
+		put_int32(payload+62, vsr);
 
- 
-		
 		// Get the motor Position and write it in the buffer
-		
-		kh4_get_position(&vsl,&vsr,dsPic ); // 57-64
- 		Buffer[57]=(u_int8_t )(vsl & 0x00FF);
-    Buffer[58]=(u_int8_t )((vsl>>8) & 0x00FF);
-    Buffer[59]=(u_int8_t )((vsl>>16) & 0x00FF);
-    Buffer[60]=(u_int8_t )((vsl>>24) & 0x00FF);
-    Buffer[61]=(u_int8_t )(vsr & 0x00FF);
-    Buffer[62]=(u_int8_t )((vsr>>8) & 0x00FF);
-		Buffer[63]=(u_int8_t )((vsr>>16) & 0x00FF);
-    Buffer[64]=(u_int8_t )((vsr>>24) & 0x00FF);
-    
-    // TODO: add accel or gyro?!
-    
-    Buffer[65]='\n';
-    Buffer[66]='\r';
-    Buffer[67]='\0';
-		
-		com_send(Buffer, sizeof(Buffer));
+		kh4_get_position(&vsl,&vsr,dsPic );
+		put_int32(payload+66, vsl);
+		put_int32(payload+70, vsr);
+
+		for (i=0; i<BINARY_PAYLOAD; i++)
+			checksum += (unsigned char)payload[i];
+		payload[BINARY_PAYLOAD]=checksum;
+
+		com_send(Buffer, BINARY_PAYLOAD+3);
 		
 		#ifdef DEBUG
 			printf("\nBinaryRead (hexa): ");
-			for (i=0; i<66; i++)
-				printf(" %02x",Buffer[i]);
+			for (i=0; i<BINARY_PAYLOAD+3; i++)
+				printf(" %02x",(unsigned char)Buffer[i]);
 		#endif	
 						
 		
@@ -1424,6 +1474,9 @@ int process_command ()
 			case 'P':
 				ConfigPosMargin(narg,larg);	
 				break;
+			case 'Q':
+				ReadSensorFrame(narg,larg);
+				break;
 			case 'R': 
 				ReadPos(narg,larg);	
 				break;
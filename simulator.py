@@ -0,0 +1,404 @@
+##
+# @file simulator.py
+#
+# @brief Simple 2D arena simulator of a Khepera IV for the simulation mode of the model.
+#
+# @author  Louis L'Haridon
+#
+# @section description_simulator Description
+# The arena is a rectangle surrounded by walls, with ground patches (food, shade)
+# and moving predators (disks bouncing on the walls).
+# The simulated robot moves with differential drive kinematics from the motor speeds
+# sent by the model and its sensors are computed from the arena :
+# - 8 proximity IR sensors and 5 ultrasonic sensors are ray-casted against walls and predators
+# - 4 ground IR sensors read the value of the ground under them
+# Sensor values are raw values in the same ranges and order as the replies of the server,
+# so they go through the same Sensor parsing as on the real robot.
+# SimulatedServer answers the commands of server/server.c, transport.MockTransport connects it to the model
+# as an in-memory serial port, to run the real robot code path offline.
+#
+# Copyright (c) 2022 Louis L'Haridon.  All rights reserved.
+
+# Modules
+import math
+import random
+import struct
+
+# GLOBAL PARAMETERS
+# ----------------------------------------------------------------------------------------------------------------------
+ROBOT_RADIUS = 0.07         #radius of the robot (m)
+WHEEL_BASE = 0.1054         #distance between the wheels (m)
+SPEED_TO_MS = 0.000678      #motor speed unit of the server to m/s
+IR_RANGE = 0.25             #max distance (m) seen by proximity sensors
+IR_MAX = 1023               #proximity value of an object in contact
+US_MIN = 0.25               #min distance (m) measured by ultrasonic sensors
+US_MAX = 2.0                #max distance (m) measured by ultrasonic sensors
+US_NO_ECHO = 1000           #ultrasonic value when nothing is seen
+FLOOR_VALUE = 800           #ground sensor value of the floor
+AMBIENT_VALUE = 4000        #ambient IR value
+ERROR_CMD_CHAR = '$'        #reply of the server to an unknown command
+BINARY_PAYLOAD = struct.Struct("<5H12H12H2i2i")     #payload of the 'X' binary frame of the server
+#angles (deg, 0 is front, counterclockwise) of the proximity sensors, same order as the server
+IR_ANGLES = [135.0, 90.0, 45.0, 0.0, -45.0, -90.0, -135.0, 180.0]
+#angles (deg) of the ultrasonic sensors
+US_ANGLES = [90.0, 45.0, 0.0, -45.0, -90.0]
+#positions (forward, left) in m of the ground sensors relative to the center of the robot
+GND_POSITIONS = [(0.05, 0.03), (0.05, 0.01), (0.05, -0.01), (0.05, -0.03)]
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# The class `Patch` defines a disk on the ground with its own ground sensor value
+class Patch:
+    def __init__(
+            self,
+            name,   #type: str
+            x,      #type: float
+            y,      #type: float
+            radius, #type: float
+            value   #type: int
+        ):
+        self.name = name
+        self.x = x
+        self.y = y
+        self.radius = radius
+        self.value = value
+
+    def contains(self, x, y):
+        """
+        This function returns True if the point (x, y) is on the patch.
+        """
+        return (x - self.x)**2 + (y - self.y)**2 <= self.radius**2
+
+
+# The class `Predator` defines a disk moving in the arena and bouncing on the walls
+class Predator:
+    def __init__(
+            self,
+            x,      #type: float
+            y,      #type: float
+            radius, #type: float
+            vx,     #type: float
+            vy      #type: float
+        ):
+        self.x = x
+        self.y = y
+        self.radius = radius
+        self.vx = vx
+        self.vy = vy
+
+    def step(
+            self,
+            arena,  #type: Arena
+            dt      #type: float
+        ):
+        """
+        This function moves the predator during dt seconds.
+        """
+        self.x += self.vx * dt
+        self.y += self.vy * dt
+        if self.x < self.radius or self.x > arena.width - self.radius:
+            self.vx = -self.vx
+            self.x = min(max(self.x, self.radius), arena.width - self.radius)
+        if self.y < self.radius or self.y > arena.height - self.radius:
+            self.vy = -self.vy
+            self.y = min(max(self.y, self.radius), arena.height - self.radius)
+
+
+# The class `Arena` defines the world: walls, ground patches and predators
+class Arena:
+    def __init__(
+            self,
+            width,                      #type: float
+            height,                     #type: float
+            floor = FLOOR_VALUE,        #type: int
+            seed = None                 #type: int
+        ):
+        self.width = width
+        self.height = height
+        self.floor = floor
+        self.patches = []   #type : list[Patch]
+        self.predators = [] #type : list[Predator]
+        self.random = random.Random(seed)
+
+    def add_patch(self, name, x, y, radius, value):
+        """
+        This function adds a ground patch to the arena.
+        """
+        self.patches.append(Patch(name, x, y, radius, value))
+
+    def add_predator(self, x, y, radius, speed):
+        """
+        This function adds a predator moving at speed (m/s) in a random direction.
+        """
+        a = self.random.uniform(0.0, 2.0 * math.pi)
+        self.predators.append(Predator(x, y, radius, speed * math.cos(a), speed * math.sin(a)))
+
+    def step(
+            self,
+            dt  #type: float
+        ):
+        """
+        This function moves the predators during dt seconds.
+        """
+        for p in self.predators:
+            p.step(self, dt)
+
+    def ground(self, x, y):
+        """
+        This function returns the ground sensor value at (x, y), the last added patch being on top.
+        """
+        for p in reversed(self.patches):
+            if p.contains(x, y):
+                return p.value
+        return self.floor
+
+    def ray(
+            self,
+            x,          #type: float
+            y,          #type: float
+            angle,      #type: float
+            max_range   #type: float
+        ):
+        """
+        This function casts a ray from (x, y) in direction angle (rad).
+
+        @return The distance to the first wall or predator hit, max_range if nothing is hit before.
+        """
+        dx = math.cos(angle)
+        dy = math.sin(angle)
+        d = max_range
+        #walls
+        if dx > 1e-9:
+            d = min(d, (self.width - x) / dx)
+        elif dx < -1e-9:
+            d = min(d, -x / dx)
+        if dy > 1e-9:
+            d = min(d, (self.height - y) / dy)
+        elif dy < -1e-9:
+            d = min(d, -y / dy)
+        #predators
+        for p in self.predators:
+            ox = p.x - x
+            oy = p.y - y
+            proj = ox * dx + oy * dy
+            if proj <= 0.0:
+                continue
+            dist2 = ox * ox + oy * oy - proj * proj
+            r2 = p.radius * p.radius
+            if dist2 <= r2:
+                d = min(d, max(0.0, proj - math.sqrt(r2 - dist2)))
+        return max(0.0, d)
+
+
+# The class `SimulatedKhepera` defines a Khepera IV moving in an arena
+class SimulatedKhepera:
+    def __init__(
+            self,
+            arena,          #type: Arena
+            x = None,       #type: float
+            y = None,       #type: float
+            theta = 0.0     #type: float
+        ):
+        self.arena = arena
+        self.x = arena.width / 2.0 if x is None else x
+        self.y = arena.height / 2.0 if y is None else y
+        self.theta = theta
+        self.left = 0.0     # speed of the left wheel (m/s)
+        self.right = 0.0    # speed of the right wheel (m/s)
+        self.time = 0.0
+        self.collisions = 0
+
+    def drive(
+            self,
+            left,   #type: float
+            right   #type: float
+        ):
+        """
+        This function sets the wheel speeds, given in motor speed units as sent to the server.
+        """
+        self.left = float(left) * SPEED_TO_MS
+        self.right = float(right) * SPEED_TO_MS
+
+    def step(
+            self,
+            dt  #type: float
+        ):
+        """
+        This function moves the arena and the robot during dt seconds.
+        """
+        self.time += dt
+        self.arena.step(dt)
+        v = (self.left + self.right) / 2.0
+        w = (self.right - self.left) / WHEEL_BASE
+        if abs(w) < 1e-9:
+            self.x += v * math.cos(self.theta) * dt
+            self.y += v * math.sin(self.theta) * dt
+        else:
+            #exact integration of an arc
+            r = v / w
+            self.x += r * (math.sin(self.theta + w * dt) - math.sin(self.theta))
+            self.y -= r * (math.cos(self.theta + w * dt) - math.cos(self.theta))
+        self.theta = (self.theta + w * dt) % (2.0 * math.pi)
+        self.collide()
+
+    def collide(self):
+        """
+        This function keeps the robot inside the walls and out of the predators.
+        """
+        hit = False
+        if self.x < ROBOT_RADIUS or self.x > self.arena.width - ROBOT_RADIUS:
+            self.x = min(max(self.x, ROBOT_RADIUS), self.arena.width - ROBOT_RADIUS)
+            hit = True
+        if self.y < ROBOT_RADIUS or self.y > self.arena.height - ROBOT_RADIUS:
+            self.y = min(max(self.y, ROBOT_RADIUS), self.arena.height - ROBOT_RADIUS)
+            hit = True
+        for p in self.arena.predators:
+            dx = self.x - p.x
+            dy = self.y - p.y
+            d = math.sqrt(dx * dx + dy * dy)
+            if d < ROBOT_RADIUS + p.radius:
+                if d < 1e-9:
+                    dx, dy, d = 1.0, 0.0, 1.0
+                push = ROBOT_RADIUS + p.radius - d
+                self.x += dx / d * push
+                self.y += dy / d * push
+                hit = True
+        if hit:
+            self.collisions += 1
+
+    def proximity(self):
+        """
+        This function returns the 8 proximity IR values (0 far - IR_MAX in contact).
+        """
+        values = []
+        for a in IR_ANGLES:
+            angle = self.theta + math.radians(a)
+            x = self.x + ROBOT_RADIUS * math.cos(angle)
+            y = self.y + ROBOT_RADIUS * math.sin(angle)
+            d = self.arena.ray(x, y, angle, IR_RANGE)
+            values.append(int(IR_MAX * (1.0 - d / IR_RANGE)**2))
+        return values
+
+    def ground(self):
+        """
+        This function returns the 4 ground IR values.
+        """
+        values = []
+        c = math.cos(self.theta)
+        s = math.sin(self.theta)
+        for fwd, lat in GND_POSITIONS:
+            values.append(self.arena.ground(self.x + fwd * c - lat * s, self.y + fwd * s + lat * c))
+        return values
+
+    def ultrasonic(self):
+        """
+        This function returns the 5 ultrasonic values (cm, US_NO_ECHO if nothing is seen).
+        """
+        values = []
+        for a in US_ANGLES:
+            angle = self.theta + math.radians(a)
+            x = self.x + ROBOT_RADIUS * math.cos(angle)
+            y = self.y + ROBOT_RADIUS * math.sin(angle)
+            d = self.arena.ray(x, y, angle, US_MAX)
+            if d >= US_MAX:
+                values.append(US_NO_ECHO)
+            else:
+                values.append(int(100 * max(d, US_MIN)))
+        return values
+
+    def sense(
+            self,
+            r_char  #type: str
+        ):
+        """
+        This function returns the raw values of a channel, as in the reply of the server.
+
+        @param r_char The char beginning the reply ('g' ultrasonic, 'n' proximity and ground, 'o' ambient,
+                      'q' ultrasonic then proximity and ground).
+        """
+        if r_char == 'g':
+            return self.ultrasonic()
+        elif r_char == 'n':
+            return self.proximity() + self.ground()
+        elif r_char == 'o':
+            return [AMBIENT_VALUE] * 12
+        elif r_char == 'q':
+            return self.ultrasonic() + self.proximity() + self.ground()
+        return []
+
+
+def default_arena(
+        food_value,         #type: int
+        shade_value,        #type: int
+        n_predators = 2,    #type: int
+        seed = None         #type: int
+    ):
+    #type: (...) -> Arena
+    """
+    It builds the arena used in simulation mode : a 2m x 2m square with two food patches,
+    two shade patches and moving predators.
+
+    @param food_value The ground value of the food patches.
+    @param shade_value The ground value of the shade patches.
+    """
+    arena = Arena(2.0, 2.0, FLOOR_VALUE, seed)
+    arena.add_patch("food", 0.4, 0.4, 0.2, food_value)
+    arena.add_patch("food", 1.6, 1.6, 0.2, food_value)
+    arena.add_patch("shade", 1.6, 0.4, 0.25, shade_value)
+    arena.add_patch("shade", 0.4, 1.6, 0.25, shade_value)
+    for i in range(n_predators):
+        arena.add_predator(arena.random.uniform(0.3, 1.7), arena.random.uniform(0.3, 1.7), 0.08, 0.15)
+    return arena
+
+
+# The class `SimulatedServer` answers the commands of the model like server/server.c, for a SimulatedKhepera
+class SimulatedServer:
+    def __init__(
+            self,
+            robot,          #type: SimulatedKhepera
+            clock = None    #type: function
+        ):
+        """
+        @param clock If given, a function returning the time (s) : before each command the robot
+                     moves for the time elapsed since the previous one, like the real robot does.
+                     Otherwise the robot is moved by the caller with robot.step().
+        """
+        self.robot = robot
+        self.clock = clock
+        self.last = clock() if clock is not None else 0.0
+        self.commands = 0
+
+    def reply(
+            self,
+            command #type: str
+        ):
+        #type: (...) -> bytes
+        """
+        This function executes a command and returns the reply of the server.
+        Text replies end with "\r\n", the 'X' command returns the binary frame
+        'x' | length | payload | checksum (motor positions are not simulated and stay 0).
+
+        @param command The command line, without its terminator.
+        """
+        self.commands += 1
+        if self.clock is not None:
+            now = self.clock()
+            if now > self.last:
+                self.robot.step(now - self.last)
+                self.last = now
+        args = command.strip().split(",")
+        c = args[0][:1]
+        if c in ('G', 'N', 'O', 'Q'):
+            values = self.robot.sense(c.lower())
+            return (c.lower() + "".join("," + str(v) for v in values) + "\r\n").encode("ascii")
+        elif c == 'D' and len(args) > 2:
+            self.robot.drive(float(args[1]), float(args[2]))
+            return b"d\r\n"
+        elif c == 'K':
+            return b"k\r\n"
+        elif c == 'X':
+            speed = [int(self.robot.left / SPEED_TO_MS), int(self.robot.right / SPEED_TO_MS)]
+            values = self.robot.ultrasonic() + self.robot.proximity() + self.robot.ground() + self.robot.sense('o')
+            payload = BINARY_PAYLOAD.pack(*(values + speed + [0, 0]))
+            return b"x" + struct.pack("<B", len(payload)) + payload + struct.pack("<B", sum(bytearray(payload)) & 0xFF)
+        return (ERROR_CMD_CHAR + "\r\n").encode("ascii")
@@ -0,0 +1,198 @@
+##
+# @file sweep.py
+#
+# @brief Runs simulated experiments of the model over a grid of parameters, in parallel.
+#
+# @author  Louis L'Haridon
+#
+# @section description_sweep Description
+# Each combination of the parameter grid is a run of the simulated robot (virtual clock, 2D arena)
+# in a process of a pool. Every run writes its own log, and the index file lists for each run
+# its parameters, its log and summary metrics.
+#
+# The grid is a json file whose keys are lists of values to combine, missing keys take the defaults :
+# - model : variant of the model, a key of model.VARIANTS ("model" or "model_w_corti")
+# - food, shade : [lower, upper] raw bounds of the stimuli
+# - alpha, decay_rate : release and decay rates of the cortisol
+# - GAIN, LOOS, SPEED_ROBOT : globals of the model
+# - seed : seed of the random behaviors and of the arena
+# - max_steps : max number of steps of a run (the run stops earlier if the robot dies)
+#
+# @section usage_sweep Usage
+# python sweep.py grid.json [output_directory] [processes]
+#
+# Copyright (c) 2022 Louis L'Haridon.  All rights reserved.
+
+# Modules
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import sys
+
+import model
+
+#the values of define_khepera() and of the globals of the model, a grid without a key sweeps the interactive model
+DEFAULTS = [
+    ("model", model.VARIANT),
+    ("food", [940, 955]),
+    ("shade", [400, 555]),
+    ("alpha", 0.025),
+    ("decay_rate", 0.005),
+    ("GAIN", model.GAIN),
+    ("LOOS", model.LOOS),
+    ("SPEED_ROBOT", model.SPEED_ROBOT),
+    ("seed", 0),
+    ("max_steps", 36000),
+]
+METRICS = ["steps", "alive", "duration", "energy", "temperature", "integrity",
+           "mean_energy", "mean_temperature", "mean_pain", "max_pain", "mean_cortisol", "collisions"]
+INDEX = "index.csv"
+
+
+def expand(
+        grid    #type: dict
+    ):
+    """
+    It returns the list of the runs of a grid, each run being a dict with a value for every parameter.
+    """
+    unknown = set(grid) - set(k for k, v in DEFAULTS)
+    if unknown:
+        raise ValueError("unknown parameters : " + ", ".join(sorted(unknown)))
+    unknown = set(grid.get("model", [])) - set(model.VARIANTS)
+    if unknown:
+        raise ValueError("unknown variants : " + ", ".join(sorted(unknown)))
+    keys = [k for k, v in DEFAULTS]
+    values = [grid.get(k, [v]) for k, v in DEFAULTS]
+    return [dict(zip(keys, combination)) for combination in itertools.product(*values)]
+
+
+def run(
+        params  #type: dict
+    ):
+    """
+    It runs one simulated experiment in the current process.
+
+    @param params The parameters of the run, with its "log" filename.
+
+    @return The summary metrics of the run.
+    """
+    #globals read by define_khepera() and Robot.update()
+    model.GAIN = params["GAIN"]
+    model.LOOS = params["LOOS"]
+    model.SPEED_ROBOT = params["SPEED_ROBOT"]
+    #one run per process at a time, rows are written by the loop
+    model.LOG_THREAD = False
+    model.set_clock(model.VirtualClock())
+    random.seed(params["seed"])
+
+    robot = model.define_khepera(True, tuple(params["food"]), tuple(params["shade"]), params["seed"], params["model"])
+    robot.cortisol_hormone.set_alpha(params["alpha"])
+    robot.cortisol_hormone.set_decay_rate(params["decay_rate"])
+
+    sums = {"energy": 0.0, "temperature": 0.0, "pain": 0.0, "cortisol": 0.0}
+    max_pain = 0.0
+    scheduler = model.Scheduler(model.TIME_SLEEP)
+    scheduler.start()
+    ts = model.clock.time() * 1000
+    iter = 0
+    while robot.is_alive() and iter < params["max_steps"]:
+        robot.update(False, True, scheduler.dt)
+        time_since_start = model.clock.time() * 1000 - ts
+        if iter == 0:
+            robot.write_header_data(params["log"])
+        iter = robot.save(params["log"], time_since_start, iter)
+        sums["energy"] += robot.get_var_by_name("energy").get_value()
+        sums["temperature"] += robot.get_var_by_name("temperature").get_value()
+        sums["pain"] += robot.pain
+        sums["cortisol"] += robot.cortisol_hormone.concentration
+        max_pain = max(max_pain, robot.pain)
+        scheduler.wait()
+    robot.close_log()
+
+    n = max(iter, 1)
+    return {
+        "steps": iter,
+        "alive": int(robot.is_alive()),
+        "duration": iter * model.TIME_SLEEP,
+        "energy": robot.get_var_by_name("energy").get_value(),
+        "temperature": robot.get_var_by_name("temperature").get_value(),
+        "integrity": robot.get_var_by_name("integrity").get_value(),
+        "mean_energy": sums["energy"] / n,
+        "mean_temperature": sums["temperature"] / n,
+        "mean_pain": sums["pain"] / n,
+        "max_pain": max_pain,
+        "mean_cortisol": sums["cortisol"] / n,
+        "collisions": robot.world.collisions if robot.world is not None else 0,
+    }
+
+
+def cell(value):
+    """
+    It formats a parameter or a metric for the index file.
+    """
+    if isinstance(value, (list, tuple)):
+        return " ".join(str(v) for v in value)
+    if isinstance(value, float):
+        return "%.6g" % value
+    return str(value)
+
+
+def sweep(
+        grid,               #type: dict
+        directory,          #type: str
+        processes = None    #type: int
+    ):
+    """
+    It runs all the experiments of a grid in a pool of processes and writes the index file.
+
+    @param grid The parameter grid.
+    @param directory The directory of the logs and of the index file.
+    @param processes The number of processes, the number of cores if None.
+
+    @return The filename of the index.
+    """
+    runs = expand(grid)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    extension = ".rlog" if model.LOG_FORMAT == "rlog" else ".csv"
+    for i, params in enumerate(runs):
+        params["log"] = os.path.join(directory, "run_%04d" % i + extension)
+    keys = [k for k, v in DEFAULTS]
+    index = os.path.join(directory, INDEX)
+    pool = multiprocessing.Pool(processes)
+    try:
+        with open(index, "w") as file:
+            file.write(",".join(["run"] + keys + ["log"] + METRICS) + "\n")
+            for i, metrics in enumerate(pool.imap(run, runs)):
+                params = runs[i]
+                row = [str(i)] + [cell(params[k]) for k in keys] + [os.path.basename(params["log"])]
+                row += [cell(metrics[m]) for m in METRICS]
+                file.write(",".join(row) + "\n")
+                file.flush()
+                print("run " + str(i + 1) + "/" + str(len(runs)) + " : " + str(metrics["steps"]) + " steps")
+        pool.close()
+    except BaseException:
+        #the error of a run or an interruption stops the other runs
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    return index
+
+
+def main(args):
+    if len(args) < 2 or args[1] == "-h":
+        print("usage : sweep.py grid.json [output_directory] [processes]")
+        return 1
+    with open(args[1], "r") as file:
+        grid = json.load(file)
+    directory = args[2] if len(args) > 2 else "data_analysis/sweep"
+    processes = int(args[3]) if len(args) > 3 else None
+    print(sweep(grid, directory, processes))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,207 @@
+##
+# @file tracing.py
+#
+# @brief Timing traces of the steps of the model, exported in the Chrome trace format.
+#
+# @author  Louis L'Haridon
+#
+# @section description_tracing Description
+# A Tracer records spans (name, start, end, thread) in a ring buffer allocated once, the oldest
+# spans being overwritten when it is full. The stages of a step are recorded with mark(), each mark
+# closing the span opened by the previous one, finer spans (serial commands) with now() and span().
+# The robot uses NULL_TRACER by default, whose methods do nothing.
+#
+# The exported json file opens in chrome://tracing or https://ui.perfetto.dev, the summary
+# gives the percentiles of the duration of each span name.
+#
+# @section usage_tracing Usage
+# python tracing.py summary run.trace.json
+#
+# Copyright (c) 2022 Louis L'Haridon.  All rights reserved.
+
+# Modules
+import json
+import sys
+import threading
+from array import array
+from timeit import default_timer as timer
+
+EXTENSION = ".trace.json"
+
+
+# The class `NullTracer` is the disabled tracer
+class NullTracer:
+    enabled = False
+
+    def now(self):
+        return 0.0
+
+    def start(self):
+        pass
+
+    def mark(self, name):
+        pass
+
+    def span(self, name, start, end = None):
+        pass
+
+    def end(self, name = "step"):
+        pass
+
+
+NULL_TRACER = NullTracer()
+
+
+# The class `Tracer` records the spans of a run in a ring buffer
+class Tracer:
+    enabled = True
+
+    def __init__(
+            self,
+            size = 65536    #type: int
+        ):
+        """
+        @param size The number of spans kept, the oldest ones are overwritten.
+        """
+        self.size = size
+        self.names = [None] * size
+        self.starts = array("d", [0.0]) * size
+        self.ends = array("d", [0.0]) * size
+        self.threads = [0] * size
+        self.lock = threading.Lock()    #spans can come from several threads
+        self.recorded = 0
+        self.origin = timer()
+        self.step_start = self.origin
+        self.last = self.origin
+
+    def now(self):
+        """
+        This function returns the time (s) of the trace clock.
+        """
+        return timer()
+
+    def span(
+            self,
+            name,       #type: str
+            start,      #type: float
+            end = None  #type: float
+        ):
+        """
+        This function records a span of the current thread.
+
+        @param start The start time given by now().
+        @param end The end time, now if None.
+        """
+        if end is None:
+            end = timer()
+        with self.lock:
+            i = self.recorded
+            self.recorded += 1
+        i %= self.size
+        self.names[i] = name
+        self.starts[i] = start
+        self.ends[i] = end
+        self.threads[i] = threading.current_thread().ident
+
+    def start(self):
+        """
+        This function begins a step, the first mark() measures from now.
+        """
+        self.step_start = self.last = timer()
+
+    def mark(
+            self,
+            name    #type: str
+        ):
+        """
+        This function records the stage ending now, started at the previous mark (or at start()).
+        Marks are made by the thread of the loop only.
+        """
+        now = timer()
+        self.span(name, self.last, now)
+        self.last = now
+
+    def end(
+            self,
+            name = "step"   #type: str
+        ):
+        """
+        This function records the whole step, from start() to now.
+        """
+        self.span(name, self.step_start)
+
+    def events(self):
+        """
+        This function returns the recorded spans (name, start, end, thread), oldest first.
+        """
+        n = min(self.recorded, self.size)
+        first = self.recorded - n
+        spans = []
+        for k in range(first, self.recorded):
+            i = k % self.size
+            spans.append((self.names[i], self.starts[i], self.ends[i], self.threads[i]))
+        return spans
+
+    def export(
+            self,
+            filename    #type: str
+        ):
+        """
+        This function writes the spans in the Chrome trace format (complete events, times in us).
+
+        @return The number of spans written.
+        """
+        spans = self.events()
+        names = dict((t.ident, t.name) for t in threading.enumerate())
+        tids = {}
+        events = []
+        for name, start, end, thread in spans:
+            if thread not in tids:
+                tids[thread] = len(tids)
+                events.append({"name": "thread_name", "ph": "M", "pid": 0, "tid": tids[thread],
+                               "args": {"name": names.get(thread, "thread " + str(thread))}})
+            events.append({"name": name, "ph": "X", "pid": 0, "tid": tids[thread],
+                           "ts": round((start - self.origin) * 1e6, 3), "dur": round((end - start) * 1e6, 3)})
+        with open(filename, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms",
+                       "otherData": {"spans": self.recorded, "dropped": max(0, self.recorded - self.size)}}, file)
+        return len(spans)
+
+
+def summary(
+        filename    #type: str
+    ):
+    """
+    It reads an exported trace.
+
+    @return The lines giving for each span name its count and duration percentiles (us).
+    """
+    with open(filename, "r") as file:
+        events = json.load(file)["traceEvents"]
+    durations = {}
+    order = []
+    for e in events:
+        if e.get("ph") == "X":
+            if e["name"] not in durations:
+                durations[e["name"]] = []
+                order.append(e["name"])
+            durations[e["name"]].append(e["dur"])
+    lines = ["{0:<16}{1:>8}{2:>10}{3:>10}{4:>10}{5:>10}{6:>10}  (us)".format("span", "count", "p50", "p90", "p99", "max", "mean")]
+    for name in order:
+        d = sorted(durations[name])
+        p = lambda q: d[int(round(q * (len(d) - 1)))]
+        lines.append("{0:<16}{1:>8}{2:>10.1f}{3:>10.1f}{4:>10.1f}{5:>10.1f}{6:>10.1f}".format(
+            name, len(d), p(0.5), p(0.9), p(0.99), d[-1], sum(d) / len(d)))
+    return lines
+
+
+def main(args):
+    if len(args) < 3 or args[1] != "summary":
+        print("usage : tracing.py summary run.trace.json")
+        return 1
+    print("\n".join(summary(args[2])))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,371 @@
+##
+# @file transport.py
+#
+# @brief Transports of the commands and replies between the model and the robot.
+#
+# @author  Louis L'Haridon
+#
+# @section description_transport Description
+# Every transport is a cstm_serial.Transport : the replies are read with the same line and binary
+# frame readers, only the way bytes are sent and received changes.
+# - "serial" : the serial port of the robot (cstm_serial.SerialPort, termios)
+# - "mock" : an in-process server (simulator.SimulatedServer) answering the commands of server/server.c
+#   ('G', 'N', 'O', 'Q', 'X', 'D', 'K') for a robot moving in the arena of simulator.py, with a
+#   configurable latency and the transmission time of the bytes at the baud rate
+# - "replay" : the replies of a recorded session, given back in the same order
+# - "capture" : the lines and frames read by the model in a captured run (Robot.start_capture()),
+#   given back in the same order at the recorded pace or as fast as possible
+# Any transport can be wrapped in a RecordTransport saving the session (commands and replies).
+#
+# session file layout :
+# - magic "KSES" and version (uint8)
+# - records : kind, time (float64, s since the start), length (uint16) and data,
+#   kind being 'w' (command written), 'r' (bytes read), 'l' (line read by the model)
+#   or 'f' (payload of a binary frame read by the model, empty if none was valid)
+#   or 's' (duration of a step of the model, float64, given to Robot.update())
+#
+# Copyright (c) 2022 Louis L'Haridon.  All rights reserved.
+
+# Modules
+import struct
+import time
+from collections import deque
+
+import cstm_serial
+import simulator
+
+SESSION_MAGIC = b"KSES"
+SESSION_VERSION = 1
+SESSION_EXTENSION = ".ksess"
+SESSION_HEADER = struct.Struct("<4sB")
+SESSION_RECORD = struct.Struct("<cdH")
+WRITE = b"w"
+READ = b"r"
+LINE = b"l"
+FRAME = b"f"
+STEP = b"s"
+STEP_DT = struct.Struct("<d")
+
+
+def to_bytes(data):
+    """
+    It returns the bytes of a command or a reply.
+    """
+    if isinstance(data, bytes):
+        return data
+    return data.encode("latin-1")
+
+
+def read_session(
+        filename    #type: str
+    ):
+    """
+    It reads a recorded session.
+
+    @return The list of the records (kind, time, data), kind being WRITE or READ.
+    """
+    with open(filename, "rb") as file:
+        magic, version = SESSION_HEADER.unpack(file.read(SESSION_HEADER.size))
+        if magic != SESSION_MAGIC or version != SESSION_VERSION:
+            raise ValueError("not a session (version " + str(SESSION_VERSION) + ")")
+        data = file.read()
+    records = []
+    offset = 0
+    while offset + SESSION_RECORD.size <= len(data):
+        kind, t, n = SESSION_RECORD.unpack_from(data, offset)
+        offset += SESSION_RECORD.size
+        records.append((kind, t, bytes(data[offset:offset + n])))
+        offset += n
+    return records
+
+
+# The class `SessionWriter` writes the records of a session file
+class SessionWriter:
+    def __init__(
+            self,
+            filename    #type: str
+        ):
+        self.filename = filename
+        self.file = open(filename, "wb")
+        self.file.write(SESSION_HEADER.pack(SESSION_MAGIC, SESSION_VERSION))
+        self.origin = time.time()
+        self.records = 0
+
+    def record(
+            self,
+            kind,   #type: bytes
+            data    #type: bytes
+        ):
+        """
+        This function writes a record timestamped now.
+        """
+        data = to_bytes(data)
+        self.file.write(SESSION_RECORD.pack(kind, time.time() - self.origin, len(data)) + data)
+        self.records += 1
+
+    def close(self):
+        self.file.close()
+
+
+# The class `QueuedTransport` gives bytes to the reader once they are due
+class QueuedTransport(cstm_serial.Transport):
+    def __init__(
+            self,
+            timeout = cstm_serial.READ_TIMEOUT  #type: float
+        ):
+        cstm_serial.Transport.__init__(self, True, timeout)
+        self.pending = deque()  #(due time, bytes), in the order they are received
+
+    def push(
+            self,
+            data,           #type: bytes
+            delay = 0.0     #type: float
+        ):
+        """
+        This function makes data readable in delay seconds, after the bytes pushed before.
+        """
+        if delay <= 0 and not self.pending:
+            self.rbuf.extend(data)
+            return
+        due = time.time() + delay
+        if self.pending:
+            due = max(due, self.pending[-1][0])
+        self.pending.append((due, data))
+
+    def fill(self, timeout):
+        if not self.pending:
+            #nothing is coming
+            return 0
+        wait = self.pending[0][0] - time.time()
+        if wait > timeout:
+            time.sleep(max(0.0, timeout))
+            return 0
+        if wait > 0:
+            time.sleep(wait)
+        n = 0
+        now = time.time()
+        while self.pending and self.pending[0][0] <= now:
+            data = self.pending.popleft()[1]
+            self.rbuf.extend(data)
+            n += len(data)
+        return n
+
+
+# The class `MockTransport` connects the model to a simulator.SimulatedServer
+class MockTransport(QueuedTransport):
+    def __init__(
+            self,
+            server,             #type: simulator.SimulatedServer
+            latency = 0.0,      #type: float
+            bps = None,         #type: int
+            timeout = cstm_serial.READ_TIMEOUT  #type: float
+        ):
+        """
+        @param latency The time (s) the server takes to answer a command.
+        @param bps If given, the bytes of the command and of the reply also take their
+                   transmission time at this baud rate (10 bits per byte).
+        """
+        QueuedTransport.__init__(self, timeout)
+        self.server = server
+        self.latency = latency
+        self.bps = bps
+
+    def write(self, data):
+        if isinstance(data, bytes):
+            data = cstm_serial.to_str(data)
+        for command in data.split("\n"):
+            if command:
+                reply = self.server.reply(command)
+                delay = self.latency
+                if self.bps:
+                    delay += (len(command) + 1 + len(reply)) * 10.0 / self.bps
+                self.push(reply, delay)
+
+
+# The class `RecordTransport` saves the commands and replies going through a transport
+class RecordTransport(cstm_serial.Transport):
+    def __init__(
+            self,
+            transport,  #type: cstm_serial.Transport
+            filename    #type: str
+        ):
+        cstm_serial.Transport.__init__(self, transport.buffered, transport.timeout)
+        self.transport = transport
+        self.session = SessionWriter(filename)
+
+    def fill(self, timeout):
+        if not self.transport.rbuf:
+            self.transport.fill(timeout)
+        data = bytes(self.transport.rbuf)
+        del self.transport.rbuf[:]
+        if data:
+            self.session.record(READ, data)
+            self.rbuf.extend(data)
+        return len(data)
+
+    def write(self, data):
+        data = to_bytes(data)
+        self.session.record(WRITE, data)
+        self.transport.write(data)
+
+    def close(self):
+        self.session.close()
+        self.transport.close()
+
+
+# The class `ReplayTransport` gives back the replies of a recorded session
+class ReplayTransport(QueuedTransport):
+    def __init__(
+            self,
+            filename,           #type: str
+            realtime = True,    #type: bool
+            timeout = cstm_serial.READ_TIMEOUT  #type: float
+        ):
+        """
+        Each command written releases the replies recorded after the same command of the session,
+        with their recorded delays if realtime is True, at once otherwise.
+        EOFError is raised by the first command written after the end of the session,
+        the next ones are ignored.
+        """
+        QueuedTransport.__init__(self, timeout)
+        self.filename = filename
+        self.realtime = realtime
+        self.exchanges = [] #(command, time, [(time, reply bytes)])
+        self.index = 0
+        self.mismatches = 0     #commands different from the recorded ones
+        self.finished = False
+        replies = []
+        for kind, t, data in read_session(filename):
+            if kind == WRITE:
+                replies = []
+                self.exchanges.append((data, t, replies))
+            elif kind != READ:
+                continue
+            elif not self.exchanges:
+                #bytes received before the first command
+                self.push(data)
+            else:
+                replies.append((t, data))
+
+    def write(self, data):
+        if self.index >= len(self.exchanges):
+            if not self.finished:
+                self.finished = True
+                raise EOFError("end of the replayed session " + self.filename)
+            return
+        command, t, replies = self.exchanges[self.index]
+        self.index += 1
+        if command != to_bytes(data):
+            self.mismatches += 1
+        for tr, reply in replies:
+            self.push(reply, tr - t if self.realtime else 0.0)
+
+
+# The class `CaptureTransport` gives back the lines and frames read by the model in a captured run
+class CaptureTransport(cstm_serial.Transport):
+    def __init__(
+            self,
+            filename,           #type: str
+            realtime = False    #type: bool
+        ):
+        """
+        Each line (or frame) read returns the next one of the capture, commands are ignored :
+        the model reads the same data in the same order as in the captured run.
+        If realtime is True a line is returned at the time it was read in the captured run,
+        at once otherwise. EOFError is raised when reading past the end of the capture.
+        The durations of the captured steps are given back by step_dt().
+        """
+        cstm_serial.Transport.__init__(self, True, 0.0)
+        self.filename = filename
+        self.realtime = realtime
+        records = read_session(filename)
+        self.records = [(kind, t, data) for kind, t, data in records if kind in (LINE, FRAME)]
+        self.steps = deque(STEP_DT.unpack(data)[0] for kind, t, data in records if kind == STEP)
+        self.index = 0
+        self.origin = None
+        self.commands = 0
+
+    def next(
+            self,
+            kind    #type: bytes
+        ):
+        """
+        This function returns the data of the next record, which must be of the given kind.
+        """
+        if self.index >= len(self.records):
+            raise EOFError("end of the capture " + self.filename)
+        k, t, data = self.records[self.index]
+        if k != kind:
+            raise ValueError("capture " + self.filename + " : record " + str(self.index) + " is not a " + ("line" if kind == LINE else "frame"))
+        self.index += 1
+        if self.realtime:
+            if self.origin is None:
+                self.origin = time.time() - t
+            wait = self.origin + t - time.time()
+            if wait > 0:
+                time.sleep(wait)
+        return data
+
+    def step_dt(
+            self,
+            default #type: float
+        ):
+        """
+        This function returns the duration (s) of the next captured step,
+        default if there is none (capture made before the steps were recorded).
+        """
+        if self.steps:
+            return self.steps.popleft()
+        return default
+
+    def read_until(self, until, timeout = None):
+        return cstm_serial.to_str(self.next(LINE))
+
+    def read_frame(self, header, timeout = cstm_serial.READ_TIMEOUT):
+        return self.next(FRAME) or None
+
+    def fill(self, timeout):
+        return 0
+
+    def write(self, data):
+        self.commands += 1
+
+
+def open_transport(
+        kind,               #type: str
+        port,               #type: str
+        baudrate,           #type: int
+        buffered = True,    #type: bool
+        arena = None,       #type: simulator.Arena
+        latency = 0.0,      #type: float
+        clock = None,       #type: function
+        filename = None,    #type: str
+        record = None,      #type: str
+        realtime = True     #type: bool
+    ):
+    #type: (...) -> cstm_serial.Transport
+    """
+    It opens a transport.
+
+    @param kind "serial", "mock", "replay" or "capture".
+    @param arena The arena of the robot of the mock server.
+    @param latency The latency (s) of the mock server.
+    @param clock The function giving the time (s) moving the robot of the mock server.
+    @param filename The session given back by the replay or capture transport.
+    @param realtime If False the replay and capture transports give the data back as fast as possible.
+    @param record If given, the file where the session is recorded.
+    """
+    if kind == "serial":
+        com = cstm_serial.SerialPort(port, baudrate, buffered)
+    elif kind == "mock":
+        server = simulator.SimulatedServer(simulator.SimulatedKhepera(arena), clock or time.time)
+        com = MockTransport(server, latency, baudrate)
+    elif kind == "replay":
+        com = ReplayTransport(filename, realtime)
+    elif kind == "capture":
+        com = CaptureTransport(filename, realtime)
+    else:
+        raise ValueError("unknown transport : " + str(kind))
+    if record:
+        com = RecordTransport(com, record)
+    return com